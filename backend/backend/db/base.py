@@ -0,0 +1,50 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from .pool import PoolTimeoutError, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_checked_at = time.monotonic()
+
+    def get_pool(self, conn_params):
+        return get_pool(
+            self.alias,
+            self.settings_dict['POOL'],
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+        )
+
+    def get_new_connection(self, conn_params):
+        if not self.settings_dict.get('POOL'):
+            return super().get_new_connection(conn_params)
+        try:
+            return self.get_pool(conn_params).acquire()
+        except PoolTimeoutError as error:
+            raise base.Database.OperationalError(str(error)) from error
+
+    def _close(self):
+        if not self.settings_dict.get('POOL'):
+            return super()._close()
+        with self.wrap_database_errors:
+            self.get_pool(None).release(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        interval = self.settings_dict.get('HEALTH_CHECK_INTERVAL')
+        if (
+            self.connection is None
+            or interval is None
+            or self.in_atomic_block
+        ):
+            return
+        now = time.monotonic()
+        if now - self.health_checked_at >= interval:
+            self.health_checked_at = now
+            if not self.is_usable():
+                self.close()
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import deque
+
+from backend.metrics import store
+
+POOL_TIMEOUT = 'Нет свободного соединения с БД за {timeout} с'
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+
+    def __init__(self, alias, connect, max_size, timeout, check_interval):
+        self.alias = alias
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.size = 0
+
+    def event(self, name):
+        store.inc(
+            'foodgram_db_pool_events_total',
+            (('alias', self.alias), ('event', name))
+        )
+
+    def is_healthy(self, connection, idle_since):
+        if getattr(connection, 'closed', False):
+            return False
+        if (
+            self.check_interval is None
+            or time.monotonic() - idle_since < self.check_interval
+        ):
+            return True
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+        self.event('discarded')
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            with self.condition:
+                if self.idle:
+                    connection, idle_since = self.idle.pop()
+                elif self.size < self.max_size:
+                    self.size += 1
+                    connection = None
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.event('timeout')
+                        raise PoolTimeoutError(
+                            POOL_TIMEOUT.format(timeout=self.timeout)
+                        )
+                    waited = True
+                    self.condition.wait(remaining)
+                    continue
+            if connection is None:
+                try:
+                    connection = self.connect()
+                except Exception:
+                    with self.condition:
+                        self.size -= 1
+                        self.condition.notify()
+                    raise
+                self.event('created')
+            elif self.is_healthy(connection, idle_since):
+                self.event('reused')
+            else:
+                self.discard(connection)
+                continue
+            if waited:
+                self.event('waited')
+            store.observe(
+                'foodgram_db_pool_wait_seconds',
+                (('alias', self.alias),),
+                time.monotonic() - started
+            )
+            return connection
+
+    def release(self, connection):
+        try:
+            if getattr(connection, 'closed', False):
+                raise ValueError
+            connection.rollback()
+        except Exception:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+        self.event('released')
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'max_size': self.max_size,
+            }
+
+
+def get_pool(alias, options, connect):
+    pool = pools.get(alias)
+    if pool is None:
+        with pools_lock:
+            pool = pools.get(alias)
+            if pool is None:
+                pool = pools[alias] = ConnectionPool(
+                    alias,
+                    connect,
+                    options['MAX_SIZE'],
+                    options.get('TIMEOUT', 10),
+                    options.get('CHECK_INTERVAL'),
+                )
+    return pool
@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DESCRIPTIONS = {
+    'foodgram_http_requests_total': (
+        'counter', 'HTTP requests by view, method and status.'
+    ),
+    'foodgram_http_request_duration_seconds': (
+        'histogram', 'HTTP request latency by view and method.'
+    ),
+    'foodgram_db_queries_total': (
+        'counter', 'SQL statements executed by view and method.'
+    ),
+    'foodgram_db_query_duration_seconds_total': (
+        'counter', 'Time spent in SQL by view and method.'
+    ),
+    'foodgram_cache_requests_total': (
+        'counter', 'Response cache lookups by view and outcome.'
+    ),
+    'foodgram_db_pool_events_total': (
+        'counter', 'Connection pool events by alias and event.'
+    ),
+    'foodgram_db_pool_wait_seconds': (
+        'histogram', 'Time spent waiting for a pooled connection.'
+    ),
+    'foodgram_cache_hit_ratio': (
+        'gauge', 'Share of response cache lookups served from the cache.'
+    ),
+}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsStore:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed = 0.0
+        self.pid = None
+        self.name = None
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[name, labels] = {
+                    'buckets': [0] * (len(BUCKETS) + 1), 'sum': 0.0,
+                }
+            histogram['buckets'][bisect_left(BUCKETS, value)] += 1
+            histogram['sum'] += value
+
+    def dump(self):
+        with self.lock:
+            return {
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, labels, histogram['buckets'], histogram['sum']]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (
+            not force and now - self.flushed < settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        self.flushed = now
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.name = f'{self.pid}-{uuid.uuid4().hex}'
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{self.name}.json')
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.dump(), file)
+        os.replace(f'{path}.tmp', path)
+
+
+store = MetricsStore()
+
+
+def load_dumps():
+    directory = settings.METRICS_DIR
+    if not directory:
+        return [store.dump()]
+    store.flush(force=True)
+    dumps = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as file:
+                dumps.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+    return dumps
+
+
+def aggregate(dumps):
+    counters = defaultdict(float)
+    histograms = {}
+    for dump in dumps:
+        for name, labels, value in dump['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, buckets, total in dump['histograms']:
+            key = name, tuple(map(tuple, labels))
+            merged = histograms.setdefault(
+                key, {'buckets': [0] * len(buckets), 'sum': 0.0}
+            )
+            merged['buckets'] = [
+                left + right for left, right in zip(merged['buckets'], buckets)
+            ]
+            merged['sum'] += total
+    return counters, histograms
+
+
+def cache_ratios(counters):
+    lookups = defaultdict(lambda: {'HIT': 0, 'MISS': 0})
+    for (name, labels), value in counters.items():
+        if name == 'foodgram_cache_requests_total':
+            labels = dict(labels)
+            lookups[labels['view']][labels['outcome']] += value
+    return {
+        ('foodgram_cache_hit_ratio', (('view', view),)):
+            outcomes['HIT'] / (outcomes['HIT'] + outcomes['MISS'])
+        for view, outcomes in lookups.items()
+    }
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace(
+        '"', '\\"'
+    ).replace('\n', '\\n')
+
+
+def format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{key}="{escape(value)}"' for key, value in pairs
+    ) + '}'
+
+
+def render(counters, histograms):
+    samples = defaultdict(list)
+    for (name, labels), value in sorted(counters.items()):
+        samples[name].append(
+            f'{name}{format_labels(labels)} {float(value)!r}'
+        )
+    for (name, labels), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(
+            (*BUCKETS, '+Inf'), histogram['buckets']
+        ):
+            cumulative += count
+            samples[name].append(
+                f'{name}_bucket{format_labels(labels, le=bound)} {cumulative}'
+            )
+        samples[name].append(
+            f'{name}_sum{format_labels(labels)} {histogram["sum"]!r}'
+        )
+        samples[name].append(
+            f'{name}_count{format_labels(labels)} {cumulative}'
+        )
+    lines = []
+    for name, (kind, description) in DESCRIPTIONS.items():
+        if name in samples:
+            lines += [
+                f'# HELP {name} {description}',
+                f'# TYPE {name} {kind}',
+                *samples[name],
+            ]
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsPermission(permissions.BasePermission):
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if token and constant_time_compare(header, f'Bearer {token}'):
+            return True
+        return request.user.is_staff
+
+
+class MetricsView(APIView):
+    permission_classes = (MetricsPermission,)
+
+    def get(self, request):
+        counters, histograms = aggregate(load_dumps())
+        counters.update(cache_ratios(counters))
+        return HttpResponse(
+            render(counters, histograms), content_type=CONTENT_TYPE
+        )
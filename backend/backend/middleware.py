@@ -0,0 +1,177 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.serializers import BaseSerializer
+
+from recipes.response_cache import CACHE_HEADER
+from .metrics import store
+
+logger = logging.getLogger('foodgram.requests')
+
+IGNORED_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO')
+
+current = threading.local()
+
+
+class RequestProfile:
+
+    def __init__(self):
+        self.queries = []
+        self.serialize = 0.0
+        self.render = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def db_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def slowest(self, count):
+        return sorted(
+            self.queries, key=lambda query: query[1], reverse=True
+        )[:count]
+
+    def duplicates(self, threshold):
+        repeated = Counter(
+            sql for sql, _ in self.queries
+            if not sql.startswith(IGNORED_STATEMENTS)
+        )
+        return [
+            (sql, count) for sql, count in repeated.most_common()
+            if count >= threshold
+        ]
+
+
+def profiled_data(self):
+    profile = getattr(current, 'profile', None)
+    if profile is None or getattr(current, 'serializing', False):
+        return serializer_data.fget(self)
+    current.serializing = True
+    started = time.perf_counter()
+    try:
+        return serializer_data.fget(self)
+    finally:
+        profile.serialize += time.perf_counter() - started
+        current.serializing = False
+
+
+serializer_data = BaseSerializer.data
+
+
+def ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class RequestProfilingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        BaseSerializer.data = property(profiled_data)
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+        profile = current.profile
+
+        def rendered(response):
+            profile.render += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def __call__(self, request):
+        profile = current.profile = RequestProfile()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            current.profile = None
+        total = time.perf_counter() - started
+        db_time = profile.db_time
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={ms(db_time)};desc="{len(profile.queries)} queries"',
+            f'serialize;dur={ms(profile.serialize)}',
+            f'render;dur={ms(profile.render)}',
+            f'total;dur={ms(total)}',
+        ))
+        duplicates = profile.duplicates(settings.PROFILING_DUPLICATE_QUERIES)
+        if (
+            total * 1000 >= settings.PROFILING_SLOW_REQUEST_MS
+            or len(profile.queries) >= settings.PROFILING_MAX_QUERIES
+            or duplicates
+        ):
+            logger.warning(json.dumps({
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'total_ms': ms(total),
+                'db_ms': ms(db_time),
+                'serialize_ms': ms(profile.serialize),
+                'render_ms': ms(profile.render),
+                'queries': len(profile.queries),
+                'slowest': [
+                    {'sql': sql, 'ms': ms(duration)}
+                    for sql, duration in profile.slowest(
+                        settings.PROFILING_SLOWEST_QUERIES
+                    )
+                ],
+                'duplicates': [
+                    {'sql': sql, 'count': count}
+                    for sql, count in duplicates
+                ],
+            }, ensure_ascii=False))
+        return response
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = {'count': 0, 'duration': 0.0}
+
+        def count_queries(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries['count'] += 1
+                queries['duration'] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        labels = (('view', view), ('method', request.method))
+        store.inc(
+            'foodgram_http_requests_total',
+            labels + (('status', str(response.status_code)),)
+        )
+        store.observe(
+            'foodgram_http_request_duration_seconds', labels, elapsed
+        )
+        store.inc('foodgram_db_queries_total', labels, queries['count'])
+        store.inc(
+            'foodgram_db_query_duration_seconds_total',
+            labels, queries['duration']
+        )
+        if response.has_header(CACHE_HEADER):
+            store.inc(
+                'foodgram_cache_requests_total',
+                (('view', view), ('outcome', response[CACHE_HEADER]))
+            )
+        store.flush()
+        return response
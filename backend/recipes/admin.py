@@ -17,8 +17,9 @@ class IngredientInRecipeAdmin(admin.ModelAdmin):
 
 
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'author', 'name',)
+    list_display = ('id', 'author', 'name', 'favorites_count')
     list_filter = ('author', 'name', 'tags')
+    readonly_fields = ('favorites_count', 'purchases_count')
 
 
 class TagAdmin(admin.ModelAdmin):
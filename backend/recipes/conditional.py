@@ -0,0 +1,110 @@
+import hashlib
+import math
+import time
+from datetime import datetime, timezone
+
+from django.db.models import Count, Exists, Max, OuterRef
+
+from users.models import Follow
+from .models import Favorite, Purchase, Recipe, Tag
+from .response_cache import VERSION_KEY, get_changed, get_version
+from .search import ingredient_index
+
+AUTHOR_FIELDS = (
+    'author_id', 'author__email', 'author__username',
+    'author__first_name', 'author__last_name',
+)
+
+
+def make_etag(*parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def get_last_modified(resource, *updated):
+    changed = math.ceil(max([
+        get_changed(resource),
+        *(value.timestamp() for value in updated if value is not None)
+    ]))
+    if changed > time.time():
+        return None
+    return datetime.fromtimestamp(changed, timezone.utc)
+
+
+def get_recipe_validators(request, pk):
+    if not hasattr(request, '_recipe_validators'):
+        queryset = Recipe.objects.filter(pk=pk)
+        user = request.user
+        flags = ()
+        if not user.is_anonymous:
+            flags = ('is_favorited', 'is_in_shopping_cart', 'is_subscribed')
+            queryset = queryset.annotate(
+                is_favorited=Exists(Favorite.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                )),
+                is_in_shopping_cart=Exists(Purchase.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                )),
+                is_subscribed=Exists(Follow.objects.filter(
+                    user=user, author=OuterRef('author')
+                ))
+            )
+        row = queryset.values_list(
+            'pub_date', 'updated_at', *AUTHOR_FIELDS, *flags
+        ).first()
+        if row is None:
+            request._recipe_validators = (None, None)
+        else:
+            request._recipe_validators = (
+                make_etag(
+                    get_version(VERSION_KEY.format(resource='recipes')),
+                    pk, *row[1:]
+                ),
+                get_last_modified('recipes', row[0], row[1])
+            )
+    return request._recipe_validators
+
+
+def recipe_etag(request, pk, *args, **kwargs):
+    return get_recipe_validators(request, pk)[0]
+
+
+def recipe_last_modified(request, pk, *args, **kwargs):
+    if not request.user.is_anonymous:
+        return None
+    return get_recipe_validators(request, pk)[1]
+
+
+def get_catalogue_validators(request, model, resource):
+    if not hasattr(request, '_catalogue_validators'):
+        stats = model.objects.aggregate(
+            count=Count('id'), updated=Max('updated_at')
+        )
+        request._catalogue_validators = (
+            make_etag(
+                request.get_full_path(), stats['count'], stats['updated']
+            ),
+            get_last_modified(resource, stats['updated'])
+        )
+    return request._catalogue_validators
+
+
+def tags_etag(request, *args, **kwargs):
+    return get_catalogue_validators(request, Tag, 'tags')[0]
+
+
+def tags_last_modified(request, *args, **kwargs):
+    return get_catalogue_validators(request, Tag, 'tags')[1]
+
+
+def ingredients_etag(request, *args, **kwargs):
+    ingredient_index.refresh()
+    return make_etag(
+        request.get_full_path(),
+        ingredient_index.version,
+        *ingredient_index.signature
+    )
+
+
+def ingredients_last_modified(request, *args, **kwargs):
+    ingredient_index.refresh()
+    return get_last_modified('ingredients', ingredient_index.signature[1])
@@ -3,9 +3,25 @@ import uuid
 
 from django.core.files.base import ContentFile
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from .images import validate_image
+from .models import ImageUpload
+
+UNKNOWN_UPLOAD = 'Загруженная картинка не найдена'
 
 
 class Base64ImageField(serializers.ImageField):
+    def uploaded_image(self, token):
+        request = self.context.get('request')
+        try:
+            upload = ImageUpload.objects.get(
+                token=uuid.UUID(token), user=request.user
+            )
+        except (ValueError, AttributeError, ImageUpload.DoesNotExist):
+            raise serializers.ValidationError(UNKNOWN_UPLOAD)
+        return upload.image
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
@@ -14,4 +30,34 @@ class Base64ImageField(serializers.ImageField):
             data = ContentFile(
                 base64.b64decode(imgstr), name=id.urn[9:] + '.' + ext
             )
-        return super().to_internal_value(data)
+        elif isinstance(data, str):
+            return self.uploaded_image(data)
+        return validate_image(super().to_internal_value(data))
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        try:
+            pks = [int(pk) for pk in data]
+        except (TypeError, ValueError):
+            child.fail('incorrect_type', data_type=type(data[0]).__name__)
+        found = child.get_queryset().in_bulk(pks)
+        for pk in pks:
+            if pk not in found:
+                child.fail('does_not_exist', pk_value=pk)
+        return [found[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
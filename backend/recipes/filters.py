@@ -1,7 +1,25 @@
 import django_filters as filters
+from django import forms
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django_filters.widgets import BooleanWidget
 
-from .models import Ingredient, Recipe
+from .models import Favorite, Ingredient, Purchase, Recipe, Tag
+
+TAG_IDS_KEY = 'tag_ids_by_slug'
+
+
+def get_tag_ids(slugs=()):
+    tag_ids = cache.get(TAG_IDS_KEY)
+    if tag_ids is None or not tag_ids.keys() >= set(slugs):
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(TAG_IDS_KEY, tag_ids, settings.RESPONSE_CACHE_TIMEOUT)
+    return tag_ids
+
+
+def forget_tag_ids():
+    transaction.on_commit(lambda: cache.delete(TAG_IDS_KEY))
 
 
 class IngredientNameFilter(filters.FilterSet):
@@ -13,8 +31,9 @@ class IngredientNameFilter(filters.FilterSet):
 
 
 class RecipeFilter(filters.FilterSet):
-    tags = filters.AllValuesMultipleFilter(
-        field_name='tags__slug'
+    tags = filters.Filter(
+        method='get_tags',
+        widget=forms.MultipleHiddenInput
     )
     is_favorited = filters.BooleanFilter(
         method='get_favorite',
@@ -29,14 +48,23 @@ class RecipeFilter(filters.FilterSet):
         model = Recipe
         fields = ('is_favorited', 'is_in_shopping_cart', 'author', 'tags')
 
-    def get_favorite(self, queryset, name, value):
+    def get_tags(self, queryset, name, value):
+        tag_ids = get_tag_ids(value)
+        return queryset.filter(pk__in=Recipe.tags.through.objects.filter(
+            tag_id__in=[tag_ids[slug] for slug in value if slug in tag_ids]
+        ).values('recipe_id'))
+
+    def filter_user_recipes(self, queryset, model, value):
         user = self.request.user
+        if user.is_anonymous:
+            return queryset.none() if value else queryset
+        recipe_ids = model.objects.filter(user=user).values('recipe_id')
         if value:
-            return Recipe.objects.filter(in_favorites__user=user)
-        return Recipe.objects.all()
+            return queryset.filter(pk__in=recipe_ids)
+        return queryset.exclude(pk__in=recipe_ids)
+
+    def get_favorite(self, queryset, name, value):
+        return self.filter_user_recipes(queryset, Favorite, value)
 
     def get_is_in_shopping_cart(self, queryset, name, value):
-        user = self.request.user
-        if value:
-            return Recipe.objects.filter(in_purchases__user=user)
-        return Recipe.objects.all()
+        return self.filter_user_recipes(queryset, Purchase, value)
@@ -0,0 +1,129 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from .models import Recipe
+from .response_cache import bump_version
+from .storage import touch
+
+RENDITIONS = {
+    'card': ((480, 480), 'JPEG'),
+    'card_webp': ((480, 480), 'WEBP'),
+    'detail': ((1200, 1200), 'JPEG'),
+    'detail_webp': ((1200, 1200), 'WEBP'),
+}
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+RENDITIONS_DIR = 'renditions'
+ERROR_FORMAT = 'Допустимые форматы картинки: {formats}'
+ERROR_SIZE = 'Картинка больше {size} байт'
+ERROR_DIMENSIONS = 'Картинка больше {width}x{height} пикселей'
+
+executor = None
+
+
+def validate_image(file):
+    if file.size > settings.RECIPE_IMAGE_MAX_SIZE:
+        raise serializers.ValidationError(
+            ERROR_SIZE.format(size=settings.RECIPE_IMAGE_MAX_SIZE)
+        )
+    file.seek(0)
+    with Image.open(file) as image:
+        image_format, (width, height) = image.format, image.size
+    file.seek(0)
+    if image_format not in settings.RECIPE_IMAGE_FORMATS:
+        raise serializers.ValidationError(ERROR_FORMAT.format(
+            formats=', '.join(settings.RECIPE_IMAGE_FORMATS)
+        ))
+    max_width, max_height = settings.RECIPE_IMAGE_MAX_DIMENSIONS
+    if width > max_width or height > max_height:
+        raise serializers.ValidationError(
+            ERROR_DIMENSIONS.format(width=max_width, height=max_height)
+        )
+    return file
+
+
+def rendition_name(name, kind):
+    directory, filename = os.path.split(name)
+    base = os.path.splitext(filename)[0]
+    (width, height), image_format = RENDITIONS[kind]
+    return os.path.join(
+        directory,
+        RENDITIONS_DIR,
+        f'{base}_{width}x{height}.{EXTENSIONS[image_format]}'
+    )
+
+
+def rendition_urls(recipe, request=None):
+    if not recipe.image:
+        return None
+    if recipe.renditions_ready:
+        urls = {
+            kind: default_storage.url(rendition_name(recipe.image.name, kind))
+            for kind in RENDITIONS
+        }
+    else:
+        urls = {kind: recipe.image.url for kind in RENDITIONS}
+    if request is not None:
+        urls = {
+            kind: request.build_absolute_uri(url)
+            for kind, url in urls.items()
+        }
+    return urls
+
+
+def render(image, size, image_format):
+    image = ImageOps.exif_transpose(image)
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, quality=85)
+    return ContentFile(buffer.getvalue())
+
+
+def make_renditions(recipe):
+    missing = {}
+    for kind in RENDITIONS:
+        name = rendition_name(recipe.image.name, kind)
+        if not touch(default_storage, name):
+            missing[kind] = name
+    if missing:
+        with recipe.image.open('rb') as file, Image.open(file) as image:
+            image.load()
+            for kind, name in missing.items():
+                size, image_format = RENDITIONS[kind]
+                default_storage.save(name, render(image, size, image_format))
+    Recipe.objects.filter(
+        pk=recipe.pk, image=recipe.image.name
+    ).update(renditions_ready=True, updated_at=timezone.now())
+    bump_version('recipes')
+
+
+def process_recipe(recipe_id):
+    try:
+        recipe = Recipe.objects.filter(pk=recipe_id).first()
+        if recipe is not None and not recipe.renditions_ready:
+            make_renditions(recipe)
+    finally:
+        close_old_connections()
+
+
+def schedule_renditions(recipe):
+    global executor
+    if not settings.RECIPE_IMAGE_WORKERS:
+        return
+    if executor is None:
+        executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS
+        )
+    transaction.on_commit(
+        lambda: executor.submit(process_recipe, recipe.pk)
+    )
@@ -0,0 +1,194 @@
+import json
+import math
+import platform
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Purchase, Recipe, Tag
+from users.models import User
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, rank):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = 'Замеряет основные эндпоинты API на текущих данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--allocations',
+            type=int,
+            default=5,
+            help='requests per endpoint traced with tracemalloc'
+        )
+        parser.add_argument(
+            '--cache',
+            action='store_true',
+            help='keep the response cache enabled'
+        )
+        parser.add_argument('--only', type=str, help='comma separated names')
+        parser.add_argument('--json', type=str, help='write results here')
+
+    def get_user(self):
+        user = User.objects.filter(
+            following_count__gt=0,
+            pk__in=Favorite.objects.values('user_id'),
+        ).filter(
+            pk__in=Purchase.objects.values('user_id'),
+        ).order_by('pk').first()
+        if user is None:
+            raise CommandError(
+                'Нет пользователя с избранным, покупками и подписками, '
+                'сначала запустите generate_data'
+            )
+        return user
+
+    def get_scenarios(self, user):
+        recipe = Recipe.objects.exclude(
+            in_favorites__user=user
+        ).exclude(in_purchases__user=user).order_by('-pub_date').first()
+        tag = Tag.objects.order_by('id').first()
+        author_id = Recipe.objects.values_list(
+            'author_id', flat=True
+        ).order_by('-pub_date').first()
+        return {
+            'recipe_list': ('get', '/api/recipes/'),
+            'recipe_list_cursor': ('get', '/api/recipes/?cursor='),
+            'recipe_list_tags': ('get', f'/api/recipes/?tags={tag.slug}'),
+            'recipe_list_author': (
+                'get', f'/api/recipes/?author={author_id}'
+            ),
+            'recipe_list_favorited': (
+                'get', '/api/recipes/?is_favorited=1'
+            ),
+            'recipe_list_in_cart': (
+                'get', '/api/recipes/?is_in_shopping_cart=1'
+            ),
+            'recipe_detail': ('get', f'/api/recipes/{recipe.id}/'),
+            'subscriptions': ('get', '/api/users/subscriptions/'),
+            'download_shopping_cart': (
+                'get', '/api/recipes/download_shopping_cart/?format=txt'
+            ),
+            'favorite_add': ('post', f'/api/recipes/{recipe.id}/favorite/'),
+            'favorite_remove': (
+                'delete', f'/api/recipes/{recipe.id}/favorite/'
+            ),
+            'shopping_cart_add': (
+                'post', f'/api/recipes/{recipe.id}/shopping_cart/'
+            ),
+            'shopping_cart_remove': (
+                'delete', f'/api/recipes/{recipe.id}/shopping_cart/'
+            ),
+        }
+
+    def call(self, method, url):
+        response = getattr(self.client, method)(url)
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{method.upper()} {url}: {response.status_code}'
+            )
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+        else:
+            len(response.content)
+        return response
+
+    def run(self, name, method, url, options):
+        undo = None
+        if name.endswith('_add'):
+            undo = ('delete', url)
+        elif name.endswith('_remove'):
+            self.call('post', url)
+            undo = ('post', url)
+        for _ in range(options['warmup']):
+            self.call(method, url)
+            if undo:
+                self.call(*undo)
+        timings, queries = [], []
+        for _ in range(options['repeat']):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                self.call(method, url)
+                timings.append(time.perf_counter() - started)
+            queries.append(len(context.captured_queries))
+            if undo:
+                self.call(*undo)
+        peaks, allocated = [], []
+        for _ in range(options['allocations']):
+            tracemalloc.start()
+            self.call(method, url)
+            snapshot = tracemalloc.take_snapshot()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            allocated.append(sum(
+                stat.size for stat in snapshot.statistics('filename')
+            ))
+            if undo:
+                self.call(*undo)
+        if name.endswith('_remove'):
+            self.call('delete', url)
+        result = {'name': name, 'method': method.upper(), 'url': url}
+        for rank in PERCENTILES:
+            result[f'p{rank}_ms'] = percentile(timings, rank) * 1000
+        result.update({
+            'queries': max(queries),
+            'queries_min': min(queries),
+            'peak_kb': max(peaks, default=0) / 1024,
+            'retained_kb': max(allocated, default=0) / 1024,
+        })
+        return result
+
+    def handle(self, *args, **options):
+        user = self.get_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        scenarios = self.get_scenarios(user)
+        if options['only']:
+            names = options['only'].split(',')
+            unknown = set(names) - set(scenarios)
+            if unknown:
+                raise CommandError(
+                    f'Неизвестные сценарии: {", ".join(sorted(unknown))}'
+                )
+            scenarios = {name: scenarios[name] for name in names}
+        results = []
+        with override_settings(
+            DEBUG=False,
+            RESPONSE_CACHE_ENABLED=(
+                options['cache'] and settings.RESPONSE_CACHE_ENABLED
+            ),
+        ):
+            for name, (method, url) in scenarios.items():
+                result = self.run(name, method, url, options)
+                results.append(result)
+                self.stdout.write(
+                    '{name:>24}: p50 {p50_ms:.1f} мс, p95 {p95_ms:.1f} мс, '
+                    'p99 {p99_ms:.1f} мс, запросов {queries}, '
+                    'пик памяти {peak_kb:.0f} КБ'.format(**result)
+                )
+        if options['json']:
+            with open(options['json'], 'w') as file:
+                json.dump({
+                    'database': connection.vendor,
+                    'python': platform.python_version(),
+                    'recipes': Recipe.objects.count(),
+                    'users': User.objects.count(),
+                    'favorites': Favorite.objects.count(),
+                    'purchases': Purchase.objects.count(),
+                    'repeat': options['repeat'],
+                    'cache': options['cache'],
+                    'results': results,
+                }, file, indent=2)
@@ -0,0 +1,169 @@
+import json
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+
+from backend.db.pool import pools
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+
+    def __init__(self, *args, threads, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.executor = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request,
+                             client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность API при разных настройках '
+        'соединений с БД'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', type=str, default='/api/tags/')
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='server worker threads and concurrent clients'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='seconds per run'
+        )
+        parser.add_argument(
+            '--conn-max-age',
+            type=str,
+            default='0,600',
+            help='comma separated CONN_MAX_AGE values to compare'
+        )
+        parser.add_argument('--json', type=str, help='write results here')
+
+    def client(self, url, deadline, counts):
+        done = errors = 0
+        while time.monotonic() < deadline:
+            try:
+                with urlopen(url) as response:
+                    response.read()
+            except HTTPError:
+                errors += 1
+            done += 1
+        counts.append((done, errors))
+
+    def run(self, conn_max_age, options):
+        connections.databases[DEFAULT_DB_ALIAS]['CONN_MAX_AGE'] = (
+            conn_max_age
+        )
+        opened = []
+
+        def created(connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(created, weak=False)
+        server = PooledWSGIServer(
+            ('127.0.0.1', 0), QuietRequestHandler,
+            threads=options['threads']
+        )
+        server.set_app(WSGIHandler())
+        serving = threading.Thread(target=server.serve_forever)
+        serving.start()
+        url = 'http://127.0.0.1:{}{}'.format(
+            server.server_address[1], options['url']
+        )
+        counts = []
+        deadline = time.monotonic() + options['duration']
+        clients = [
+            threading.Thread(target=self.client, args=(url, deadline, counts))
+            for _ in range(options['threads'])
+        ]
+        started = time.monotonic()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.monotonic() - started
+        server.shutdown()
+        server.server_close()
+        serving.join()
+        connection_created.disconnect(created)
+        done = sum(count for count, _ in counts)
+        result = {
+            'conn_max_age': conn_max_age,
+            'requests': done,
+            'errors': sum(errors for _, errors in counts),
+            'rps': done / elapsed,
+            'connections': len(opened),
+        }
+        pool = pools.get(DEFAULT_DB_ALIAS)
+        if pool is not None:
+            result['pool'] = pool.stats()
+        return result
+
+    def handle(self, *args, **options):
+        try:
+            ages = [int(age) for age in options['conn_max_age'].split(',')]
+        except ValueError:
+            raise CommandError('--conn-max-age: ожидаются целые числа')
+        database = connections.databases[DEFAULT_DB_ALIAS]
+        configured = database['CONN_MAX_AGE']
+        results = []
+        try:
+            with override_settings(
+                DEBUG=False, RESPONSE_CACHE_ENABLED=False, ALLOWED_HOSTS=['*']
+            ):
+                for age in ages:
+                    result = self.run(age, options)
+                    results.append(result)
+                    self.stdout.write(
+                        'CONN_MAX_AGE={conn_max_age}: {rps:.1f} запросов/с, '
+                        'всего {requests}, ошибок {errors}, '
+                        'открыто соединений {connections}'.format(**result)
+                    )
+        finally:
+            database['CONN_MAX_AGE'] = configured
+        if options['json']:
+            with open(options['json'], 'w') as file:
+                json.dump({
+                    'database': connections[DEFAULT_DB_ALIAS].vendor,
+                    'engine': database['ENGINE'],
+                    'pool': database.get('POOL'),
+                    'python': platform.python_version(),
+                    'url': options['url'],
+                    'threads': options['threads'],
+                    'duration': options['duration'],
+                    'results': results,
+                }, file, indent=2)
@@ -0,0 +1,145 @@
+import base64
+import io
+import json
+import math
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Tag
+from users.models import User
+
+
+def make_png(size_mb):
+    side = int(math.sqrt(size_mb * 1024 * 1024 / 3))
+    image = Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def named_file(content, name):
+    file = io.BytesIO(content)
+    file.name = name
+    return file
+
+
+def measure(request):
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = request()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return response, elapsed, peak
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает загрузку картинки в base64 и multipart'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, default=5)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--json', type=str, help='write results here')
+
+    def recipe(self, image):
+        return json.dumps({
+            'name': 'benchmark',
+            'text': 'benchmark',
+            'cooking_time': 1,
+            'image': image,
+            'tags': [self.tag.id],
+            'ingredients': [{'id': self.ingredient.id, 'amount': 1}],
+        })
+
+    def base64_upload(self):
+        response = self.client.post(
+            '/api/recipes/', self.base64_body,
+            content_type='application/json'
+        )
+        assert response.status_code == 201, response.content
+        return response
+
+    def multipart_upload(self):
+        response = self.client.post(
+            '/api/recipes/images/', self.multipart_body,
+            content_type=MULTIPART_CONTENT
+        )
+        assert response.status_code == 201, response.content
+        response = self.client.post(
+            '/api/recipes/', self.recipe(response.data['token']),
+            content_type='application/json'
+        )
+        assert response.status_code == 201, response.content
+        return response
+
+    def run(self, name, request, repeat):
+        timings, peaks = [], []
+        for _ in range(repeat):
+            _, elapsed, peak = measure(request)
+            timings.append(elapsed)
+            peaks.append(peak)
+        return {
+            'mode': name,
+            'median_ms': statistics.median(timings) * 1000,
+            'max_ms': max(timings) * 1000,
+            'peak_mb': max(peaks) / 1024 / 1024,
+        }
+
+    def handle(self, *args, **options):
+        png = make_png(options['size_mb'])
+        self.multipart_body = encode_multipart(BOUNDARY, {
+            'image': named_file(png, 'benchmark.png'),
+        })
+        media_root = tempfile.mkdtemp()
+        results = []
+        try:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                RECIPE_IMAGE_WORKERS=0,
+                RECIPE_IMAGE_MAX_SIZE=len(png) + 1,
+                DATA_UPLOAD_MAX_MEMORY_SIZE=None,
+            ), transaction.atomic():
+                user = User.objects.create_user(
+                    username='benchmark', email='benchmark@example.org'
+                )
+                self.tag = Tag.objects.create(
+                    name='benchmark', slug='benchmark', color='#000000'
+                )
+                self.ingredient = Ingredient.objects.create(
+                    name='benchmark', measurement_unit='г'
+                )
+                self.client = APIClient()
+                self.client.force_authenticate(user)
+                self.base64_body = self.recipe(
+                    'data:image/png;base64,' + base64.b64encode(png).decode()
+                )
+                results.append(self.run(
+                    'base64', self.base64_upload, options['repeat']
+                ))
+                results.append(self.run(
+                    'multipart', self.multipart_upload, options['repeat']
+                ))
+                transaction.set_rollback(True)
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+        self.stdout.write(f'Картинка: {len(png) / 1024 / 1024:.1f} МБ')
+        for result in results:
+            self.stdout.write(
+                '{mode:>10}: медиана {median_ms:.0f} мс, '
+                'максимум {max_ms:.0f} мс, '
+                'пик памяти {peak_mb:.1f} МБ'.format(**result)
+            )
+        if options['json']:
+            with open(options['json'], 'w') as file:
+                json.dump(results, file, indent=2)
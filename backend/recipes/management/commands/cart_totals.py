@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import ShoppingCartTotal
+from recipes.shopping_cart import get_expected_totals
+from recipes.utils import batches
+
+
+class Command(BaseCommand):
+    help = 'Проверяет и пересобирает итоги списков покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='only report drift, do not rebuild'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='rows per bulk insert'
+        )
+
+    def handle(self, *args, **options):
+        expected = {
+            (row['recipe__in_purchases__user'], row['ingredient']):
+                row['total']
+            for row in get_expected_totals().iterator()
+        }
+        stored = {
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount in
+            ShoppingCartTotal.objects.values_list(
+                'user_id', 'ingredient_id', 'amount'
+            ).iterator()
+        }
+        drift = {
+            key for key in {*expected, *stored}
+            if expected.get(key) != stored.get(key)
+        }
+        self.stdout.write(
+            f'Строк: {len(expected)}, расхождений: {len(drift)}'
+        )
+        if options['verify']:
+            if drift:
+                raise CommandError('Итоги списков покупок расходятся')
+            return
+        with transaction.atomic():
+            ShoppingCartTotal.objects.all().delete()
+            for batch in batches(expected.items(), options['batch_size']):
+                ShoppingCartTotal.objects.bulk_create([
+                    ShoppingCartTotal(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        amount=total
+                    ) for (user_id, ingredient_id), total in batch
+                ])
+        self.stdout.write(self.style.SUCCESS('Итоги пересобраны'))
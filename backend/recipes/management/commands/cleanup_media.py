@@ -0,0 +1,70 @@
+import datetime as dt
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.images import RENDITIONS, rendition_name
+from recipes.models import ImageUpload, Recipe
+
+MEDIA_DIR = 'recipe_image'
+
+
+def walk(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name)
+    for directory in directories:
+        yield from walk(storage, os.path.join(path, directory))
+
+
+class Command(BaseCommand):
+    help = 'Удаляет картинки, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--upload-ttl',
+            type=float,
+            default=24,
+            help='hours to keep unused image uploads'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='only list files that would be removed'
+        )
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - dt.timedelta(hours=options['upload_ttl'])
+        expired = ImageUpload.objects.filter(created__lt=threshold)
+        images = set(Recipe.objects.exclude(
+            image=''
+        ).values_list('image', flat=True).distinct())
+        images |= set(ImageUpload.objects.exclude(
+            pk__in=expired.values('pk')
+        ).values_list('image', flat=True))
+        referenced = set(images)
+        for image in images:
+            referenced.update(
+                rendition_name(image, kind) for kind in RENDITIONS
+            )
+        if not default_storage.exists(MEDIA_DIR):
+            return
+        orphans = [
+            name for name in walk(default_storage, MEDIA_DIR)
+            if name not in referenced
+            and default_storage.get_modified_time(name) < threshold
+        ]
+        for name in orphans:
+            self.stdout.write(name)
+            if options['dry_run']:
+                continue
+            try:
+                if default_storage.get_modified_time(name) < threshold:
+                    default_storage.delete(name)
+            except FileNotFoundError:
+                continue
+        if not options['dry_run']:
+            expired.delete()
+        self.stdout.write(f'Неиспользуемых файлов: {len(orphans)}')
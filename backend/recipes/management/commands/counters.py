@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from recipes.models import Favorite, Purchase, Recipe
+from users.models import Follow, User
+from users.utils import count_related
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'purchases_count', Purchase, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+    (User, 'following_count', Follow, 'user'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Проверяет и исправляет счётчики рецептов и пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='only report drift, do not repair'
+        )
+
+    def handle(self, *args, **options):
+        drift = 0
+        with transaction.atomic():
+            for model, field, related_model, fk in COUNTERS:
+                actual = count_related(related_model, fk)
+                wrong = model.objects.annotate(actual=actual).exclude(
+                    **{field: F('actual')}
+                ).count()
+                drift += wrong
+                self.stdout.write(
+                    f'{model.__name__}.{field}: расхождений {wrong}'
+                )
+                if wrong and not options['verify']:
+                    model.objects.update(**{field: actual})
+        if drift and options['verify']:
+            raise CommandError('Счётчики расходятся')
@@ -0,0 +1,129 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.models import (Favorite, Ingredient, Purchase, Recipe,
+                            ShoppingCartTotal)
+from users.models import Follow, User
+
+SQLITE_IGNORED = ('SUBQUERY', 'CONSTANT ROW')
+INDEX_SCANS = ('Index Scan', 'Index Only Scan')
+ORDERED_WALKS = ('recipe_feed',)
+POSTGRESQL_ONLY = ('ingredient_prefix', 'ingredient_iprefix')
+
+
+def get_queries(user_id, tag_ids):
+    return {
+        'recipe_feed': Recipe.objects.order_by('-pub_date', '-id')[:6],
+        'author_feed': Recipe.objects.filter(
+            author_id=user_id
+        ).order_by('-pub_date')[:6],
+        'tag_feed': Recipe.objects.filter(
+            pk__in=Recipe.tags.through.objects.filter(
+                tag_id__in=tag_ids
+            ).values('recipe_id')
+        ).order_by('-pub_date', '-id')[:6],
+        'favorite_feed': Recipe.objects.filter(
+            pk__in=Favorite.objects.filter(
+                user_id=user_id
+            ).values('recipe_id')
+        ).order_by('-pub_date', '-id')[:6],
+        'cart_feed': Recipe.objects.filter(
+            pk__in=Purchase.objects.filter(
+                user_id=user_id
+            ).values('recipe_id')
+        ).order_by('-pub_date', '-id')[:6],
+        'subscriptions': Follow.objects.filter(
+            user_id=user_id
+        ).order_by('-id')[:6],
+        'shopping_cart': ShoppingCartTotal.objects.filter(user_id=user_id),
+        'ingredient_prefix': Ingredient.objects.filter(
+            name__startswith='сах'
+        ),
+        'ingredient_iprefix': Ingredient.objects.filter(
+            name__istartswith='сах'
+        ),
+    }
+
+
+def postgresql_scans(plan, walk_allowed):
+    node_type = plan.get('Node Type')
+    if node_type == 'Seq Scan' or (
+        node_type in INDEX_SCANS
+        and 'Index Cond' not in plan
+        and not walk_allowed
+    ):
+        yield plan['Relation Name']
+    for child in plan.get('Plans', ()):
+        yield from postgresql_scans(child, walk_allowed)
+
+
+def get_scans(queryset, walk_allowed):
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        return plan, list(postgresql_scans(plan[0]['Plan'], walk_allowed))
+    plan = queryset.explain()
+    return plan, [
+        line.split('SCAN', 1)[1].replace(' TABLE', '').split()[0]
+        for line in plan.splitlines()
+        if 'SCAN' in line
+        and not any(marker in line for marker in SQLITE_IGNORED)
+        and not (walk_allowed and 'USING' in line)
+    ]
+
+
+def check_plans():
+    user = User.objects.order_by('id').first()
+    queries = get_queries(
+        user.id if user else 0,
+        list(Recipe.tags.through.objects.values_list(
+            'tag_id', flat=True
+        ).distinct()[:2]) or [0]
+    )
+    results = []
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for name, queryset in queries.items():
+            if (
+                name in POSTGRESQL_ONLY
+                and connection.vendor != 'postgresql'
+            ):
+                results.append((name, None, None))
+                continue
+            plan, scans = get_scans(queryset, name in ORDERED_WALKS)
+            results.append((name, plan, scans))
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Проверяет планы ключевых запросов на последовательное чтение'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--show',
+            action='store_true',
+            help='print full plans'
+        )
+
+    def handle(self, *args, **options):
+        failed = []
+        for name, plan, scans in check_plans():
+            if options['show'] and plan is not None:
+                self.stdout.write(f'{name}:\n{plan}')
+            if scans is None:
+                self.stdout.write(f'{name}: пропущен')
+            elif scans:
+                failed.append(name)
+                self.stdout.write(
+                    f'{name}: последовательное чтение {", ".join(scans)}'
+                )
+            else:
+                self.stdout.write(f'{name}: ok')
+        if failed:
+            raise CommandError(
+                f'Запросы без подходящих индексов: {", ".join(failed)}'
+            )
@@ -0,0 +1,227 @@
+import io
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from recipes.filters import forget_tag_ids
+from recipes.management.commands.loadjson import CSVStream
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Purchase,
+                            Recipe, Tag)
+from recipes.response_cache import RESOURCES, bump_version
+from recipes.search import bump_index_version
+from recipes.storage import hashed_storage
+from recipes.utils import batches
+from users.models import Follow, User
+
+PASSWORD = 'synthetic-password'
+TAG_COLORS = ('#E26C2D', '#49B64E', '#8775D2', '#F5C518', '#3DA5D9')
+USER_FIELDS = (
+    'username', 'email', 'first_name', 'last_name', 'password',
+    'is_superuser', 'is_staff', 'is_active', 'date_joined',
+    'recipes_count', 'followers_count', 'following_count',
+)
+INGREDIENT_FIELDS = ('name', 'measurement_unit', 'updated_at')
+RECIPE_FIELDS = (
+    'author_id', 'name', 'text', 'cooking_time', 'image',
+    'renditions_ready', 'pub_date', 'updated_at',
+    'favorites_count', 'purchases_count',
+)
+
+
+def placeholder_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 200, 200)).save(buffer, 'PNG')
+    buffer.name = 'synthetic.png'
+    return hashed_storage.save('recipe_image/synthetic.png', buffer)
+
+
+def new_ids(model, rows_before):
+    return list(model.objects.filter(
+        pk__gt=rows_before
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+class Command(BaseCommand):
+    help = 'Генерирует синтетические данные для нагрузочных замеров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=10
+        )
+        parser.add_argument('--ingredients', type=int, default=2000,
+                            help='created only if the catalogue is empty')
+        parser.add_argument('--tags', type=int, default=5,
+                            help='created only if there are no tags')
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--purchases-per-user', type=int, default=5)
+        parser.add_argument('--follows-per-user', type=int, default=10)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='rows per bulk insert'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='use COPY on PostgreSQL'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def insert(self, model, fields, rows):
+        if self.copy:
+            columns = ', '.join(
+                model._meta.get_field(field).column for field in fields
+            )
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f'COPY {model._meta.db_table} ({columns}) '
+                    f'FROM STDIN WITH CSV',
+                    CSVStream(iter(rows))
+                )
+            return
+        model.objects.bulk_create(
+            [model(**dict(zip(fields, row))) for row in rows],
+            ignore_conflicts=True
+        )
+
+    def step(self, title, started):
+        self.stdout.write(f'{title}: {time.monotonic() - started:.1f} с')
+        return time.monotonic()
+
+    def reference_data(self, options):
+        if not Ingredient.objects.exists():
+            now = timezone.now()
+            self.insert(Ingredient, INGREDIENT_FIELDS, [
+                (
+                    f'ингредиент {number}',
+                    random.choice(('г', 'мл', 'шт')),
+                    now,
+                )
+                for number in range(options['ingredients'])
+            ])
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create([
+                Tag(
+                    name=f'тег {number}',
+                    slug=f'tag-{number}',
+                    color=TAG_COLORS[number % len(TAG_COLORS)]
+                )
+                for number in range(options['tags'])
+            ])
+        return (
+            list(Ingredient.objects.values_list('pk', flat=True)),
+            list(Tag.objects.values_list('pk', flat=True)),
+        )
+
+    def users(self, count):
+        password = make_password(PASSWORD)
+        now = timezone.now()
+        first = (User.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        before = first - 1
+        for batch in batches(range(first, first + count), self.batch_size):
+            self.insert(User, USER_FIELDS, [
+                (
+                    f'synthetic{number}', f'synthetic{number}@example.org',
+                    'Имя', 'Фамилия', password,
+                    False, False, True, now, 0, 0, 0,
+                )
+                for number in batch
+            ])
+        return new_ids(User, before)
+
+    def recipes(self, count, author_ids, ingredient_ids, tag_ids, per_recipe):
+        image = placeholder_image()
+        now = timezone.now()
+        recipe_ids = []
+        for batch in batches(range(count), self.batch_size):
+            before = Recipe.objects.aggregate(last=Max('pk'))['last'] or 0
+            rows = []
+            for number in batch:
+                published = now - timedelta(minutes=count - number)
+                rows.append((
+                    random.choice(author_ids), f'Рецепт {number}',
+                    'Описание синтетического рецепта', random.randint(5, 180),
+                    image, False, published, published, 0, 0,
+                ))
+            self.insert(Recipe, RECIPE_FIELDS, rows)
+            ids = new_ids(Recipe, before)
+            recipe_ids += ids
+            self.insert(
+                IngredientInRecipe, ('recipe_id', 'ingredient_id', 'amount'),
+                [
+                    (recipe_id, ingredient_id, random.randint(1, 500))
+                    for recipe_id in ids
+                    for ingredient_id in random.sample(
+                        ingredient_ids, min(per_recipe, len(ingredient_ids))
+                    )
+                ]
+            )
+            self.insert(Recipe.tags.through, ('recipe_id', 'tag_id'), [
+                (recipe_id, tag_id)
+                for recipe_id in ids
+                for tag_id in random.sample(
+                    tag_ids, random.randint(1, min(3, len(tag_ids)))
+                )
+            ])
+        return recipe_ids
+
+    def relations(self, model, fields, user_ids, target_ids, per_user):
+        size = max(self.batch_size // max(per_user, 1), 1)
+        for batch in batches(user_ids, size):
+            rows = []
+            for user_id in batch:
+                targets = set(random.sample(
+                    target_ids, min(per_user, len(target_ids))
+                ))
+                if model is Follow:
+                    targets.discard(user_id)
+                rows += [(user_id, target_id) for target_id in targets]
+            self.insert(model, fields, rows)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self.batch_size = options['batch_size']
+        self.copy = options['copy'] and connection.vendor == 'postgresql'
+        if options['copy'] and not self.copy:
+            self.stdout.write('COPY недоступен, используется bulk_create')
+        started = time.monotonic()
+        with transaction.atomic():
+            ingredient_ids, tag_ids = self.reference_data(options)
+            started = self.step('Справочники', started)
+            user_ids = self.users(options['users'])
+            started = self.step(f'Пользователи ({len(user_ids)})', started)
+            recipe_ids = self.recipes(
+                options['recipes'], user_ids, ingredient_ids, tag_ids,
+                options['ingredients_per_recipe']
+            )
+            started = self.step(f'Рецепты ({len(recipe_ids)})', started)
+            self.relations(
+                Favorite, ('user_id', 'recipe_id'), user_ids, recipe_ids,
+                options['favorites_per_user']
+            )
+            self.relations(
+                Purchase, ('user_id', 'recipe_id'), user_ids, recipe_ids,
+                options['purchases_per_user']
+            )
+            self.relations(
+                Follow, ('user_id', 'author_id'), user_ids, user_ids,
+                options['follows_per_user']
+            )
+            started = self.step('Избранное, покупки и подписки', started)
+        call_command('counters', stdout=self.stdout)
+        call_command('cart_totals', stdout=self.stdout)
+        self.step('Счётчики и итоги списков покупок', started)
+        bump_index_version()
+        bump_version(*RESOURCES)
+        forget_tag_ids()
@@ -1,29 +1,170 @@
+import csv
+import io
 import json
+import os
+import time
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
-from recipes.models import Ingredient
+from recipes.filters import forget_tag_ids
+from recipes.models import Ingredient, Tag
+from recipes.response_cache import RESOURCES, bump_version
+from recipes.search import bump_index_version
+from recipes.utils import batches
+
+INGREDIENT_FIELDS = ('name', 'measurement_unit')
+TAG_FIELDS = ('name', 'color', 'slug')
+
+
+def iter_json(file, chunk_size=65536):
+    decoder = json.JSONDecoder()
+    buffer, started, eof = '', False, False
+    while True:
+        buffer = buffer.lstrip()
+        if not started and buffer[:1] == '[':
+            buffer, started = buffer[1:], True
+            continue
+        if started and buffer[:1] == ',':
+            buffer = buffer[1:]
+            continue
+        if started and buffer[:1] == ']':
+            return
+        if started and buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                buffer = buffer[end:]
+                yield item
+                continue
+        elif buffer:
+            raise CommandError('Ожидается JSON-массив объектов')
+        if eof:
+            raise CommandError('Файл JSON оборван')
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def iter_rows(path, fields):
+    with open(path, encoding='utf-8', newline='') as file:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            for row in csv.reader(file):
+                if row:
+                    yield tuple(value.strip() for value in row[:len(fields)])
+        else:
+            for item in iter_json(file):
+                yield tuple(item[field] for field in fields)
+
+
+class CSVStream(io.TextIOBase):
+    def __init__(self, rows):
+        self.rows = rows
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.pending = ''
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.pending) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.writer.writerow(row)
+            self.pending += self.buffer.getvalue()
+            self.buffer.seek(0)
+            self.buffer.truncate()
+        if size < 0:
+            size = len(self.pending)
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
 
 
 class Command(BaseCommand):
+    help = 'Загружает ингредиенты (и теги) из JSON или CSV'
 
     def add_arguments(self, parser):
         parser.add_argument(
             "--path",
             type=str,
-            help="file path"
+            required=True,
+            help="ingredients file path (.json or .csv)"
+        )
+        parser.add_argument(
+            "--tags",
+            type=str,
+            help="tags file path (.json or .csv)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="rows per bulk insert"
+        )
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="use COPY on PostgreSQL"
         )
 
-    def handle(self, *args, **options):
-        file_path = options["path"]
-
-        with open(
-            file_path,
-            encoding='utf-8'
-        ) as f:
-            data = json.load(f)
-            for item in data:
-                Ingredient.objects.create(
-                    name=item['name'],
-                    measurement_unit=item['measurement_unit']
+    def load(self, model, fields, path, options):
+        started = time.monotonic()
+        rows = iter_rows(path, fields)
+        if options["copy"] and connection.vendor == 'postgresql':
+            created, total = self.copy(model, fields, rows)
+        else:
+            if options["copy"]:
+                self.stdout.write('COPY недоступен, используется bulk_create')
+            before, total = model.objects.count(), 0
+            for batch in batches(rows, options["batch_size"]):
+                model.objects.bulk_create(
+                    [model(**dict(zip(fields, row))) for row in batch],
+                    ignore_conflicts=True
                 )
+                total += len(batch)
+            created = model.objects.count() - before
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: прочитано {total}, '
+            f'добавлено {created}, {total / elapsed:.0f} строк/с'
+        )
+
+    def copy(self, model, fields, rows):
+        table = model._meta.db_table
+        columns = ', '.join(fields)
+        counter = {'total': 0}
+
+        def counted(rows):
+            for row in rows:
+                counter['total'] += 1
+                yield row
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE import_{table} ON COMMIT DROP AS '
+                f'SELECT {columns} FROM {table} WITH NO DATA'
+            )
+            cursor.copy_expert(
+                f'COPY import_{table} ({columns}) FROM STDIN WITH CSV',
+                CSVStream(counted(rows))
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}, updated_at) '
+                f'SELECT DISTINCT {columns}, now() FROM import_{table} '
+                f'ON CONFLICT DO NOTHING'
+            )
+            return cursor.rowcount, counter['total']
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.load(Ingredient, INGREDIENT_FIELDS, options["path"], options)
+            if options["tags"]:
+                self.load(Tag, TAG_FIELDS, options["tags"], options)
+        bump_index_version()
+        bump_version(*RESOURCES)
+        forget_tag_ids()
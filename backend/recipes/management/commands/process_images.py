@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.images import make_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Готовит уменьшенные копии картинок рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='keep running and poll for new images'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5,
+            help='seconds between polls in --loop mode'
+        )
+
+    def process(self):
+        processed = 0
+        pending = Recipe.objects.filter(
+            renditions_ready=False
+        ).exclude(image='').order_by('id')
+        for recipe in pending.iterator():
+            try:
+                make_renditions(recipe)
+            except (OSError, ValueError) as error:
+                self.stderr.write(f'Рецепт {recipe.pk}: {error}')
+                continue
+            processed += 1
+        return processed
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.process()
+            if processed:
+                self.stdout.write(f'Обработано картинок: {processed}')
+            if not options['loop']:
+                return
+            time.sleep(options['sleep'])
@@ -0,0 +1,36 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.response_cache import RESOURCES, get_stats, reset_stats
+
+LOCAL_CACHE = (
+    'Кэш хранится в памяти каждого процесса, статистика сервера отсюда '
+    'недоступна. Задайте общий CACHE_BACKEND или смотрите '
+    'foodgram_cache_requests_total в /api/metrics/'
+)
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша ответов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='reset counters after reporting'
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(caches['default'], LocMemCache):
+            raise CommandError(LOCAL_CACHE)
+        for resource in RESOURCES:
+            stats = get_stats(resource)
+            total = stats['hits'] + stats['misses']
+            ratio = stats['hits'] / total if total else 0
+            self.stdout.write(
+                f'{resource}: попаданий {stats["hits"]}, '
+                f'промахов {stats["misses"]}, доля попаданий {ratio:.1%}'
+            )
+            if options['reset']:
+                reset_stats(resource)
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.19 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, fk):
+    return Coalesce(models.Subquery(
+        model.objects.filter(
+            **{fk: models.OuterRef('pk')}
+        ).order_by().values(fk).annotate(
+            total=models.Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Favorite = apps.get_model('recipes', 'Favorite')
+    Follow = apps.get_model('users', 'Follow')
+    Purchase = apps.get_model('recipes', 'Purchase')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    User = apps.get_model('users', 'User')
+    Recipe.objects.update(
+        favorites_count=count_related(Favorite, 'recipe'),
+        purchases_count=count_related(Purchase, 'recipe'),
+    )
+    User.objects.update(
+        recipes_count=count_related(Recipe, 'author'),
+        followers_count=count_related(Follow, 'author'),
+        following_count=count_related(Follow, 'user'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_shoppingcarttotal'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='purchases_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
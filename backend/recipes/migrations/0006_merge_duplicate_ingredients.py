@@ -0,0 +1,56 @@
+# Generated by Django 2.2.19 on 2026-10-18 19:03
+
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    ShoppingCartTotal = apps.get_model('recipes', 'ShoppingCartTotal')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep=models.Min('id'), total=models.Count('id')
+    ).filter(total__gt=1).order_by()
+    if not duplicates.exists():
+        return
+    for group in duplicates:
+        extra_ids = Ingredient.objects.filter(
+            name=group['name'],
+            measurement_unit=group['measurement_unit'],
+        ).exclude(id=group['keep']).values_list('id', flat=True)
+        for extra_id in list(extra_ids):
+            IngredientInRecipe.objects.filter(
+                ingredient_id=extra_id
+            ).exclude(
+                recipe_id__in=IngredientInRecipe.objects.filter(
+                    ingredient_id=group['keep']
+                ).values('recipe_id')
+            ).update(ingredient_id=group['keep'])
+        Ingredient.objects.filter(id__in=list(extra_ids)).delete()
+    ShoppingCartTotal.objects.all().delete()
+    totals = IngredientInRecipe.objects.filter(
+        recipe__in_purchases__isnull=False
+    ).values(
+        'recipe__in_purchases__user', 'ingredient'
+    ).annotate(total=models.Sum('amount')).order_by()
+    ShoppingCartTotal.objects.bulk_create([
+        ShoppingCartTotal(
+            user_id=row['recipe__in_purchases__user'],
+            ingredient_id=row['ingredient'],
+            amount=row['total'],
+        ) for row in totals.iterator()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
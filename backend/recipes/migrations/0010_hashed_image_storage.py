@@ -0,0 +1,24 @@
+# Generated by Django 2.2.19 on 2026-10-18 19:07
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_imageupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imageupload',
+            name='image',
+            field=models.ImageField(storage=recipes.storage.HashedFileSystemStorage(), upload_to='recipe_image', verbose_name='Картинка'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=recipes.storage.HashedFileSystemStorage(), upload_to='recipe_image', verbose_name='Картинка'),
+        ),
+    ]
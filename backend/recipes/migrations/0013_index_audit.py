@@ -0,0 +1,37 @@
+# Generated by Django 2.2.19 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+UPPER_NAME_INDEX = 'ingredient_upper_name_pattern_idx'
+
+
+def create_upper_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX {UPPER_NAME_INDEX} ON recipes_ingredient '
+            f'((UPPER(name::text)) text_pattern_ops)'
+        )
+
+
+def drop_upper_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {UPPER_NAME_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_tags_tag_recipe_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['name'], name='ingredient_name_pattern_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.RunPython(create_upper_name_index, drop_upper_name_index),
+    ]
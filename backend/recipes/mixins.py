@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import connection
+
+BUDGET_EXCEEDED = (
+    'Превышен бюджет запросов для {view}.{action}: {count} > {budget}'
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudgetMixin:
+    query_budget = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        if not settings.QUERY_BUDGET_ENFORCED:
+            return super().dispatch(request, *args, **kwargs)
+        queries = []
+
+        def count_queries(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            response = super().dispatch(request, *args, **kwargs)
+        action = getattr(self, 'action', None)
+        budget = self.query_budget.get(action)
+        if budget is not None and len(queries) > budget:
+            raise QueryBudgetExceeded(BUDGET_EXCEEDED.format(
+                view=self.__class__.__name__,
+                action=action,
+                count=len(queries),
+                budget=budget
+            ))
+        return response
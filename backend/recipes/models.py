@@ -1,7 +1,10 @@
+import uuid
+
 from django.core.validators import MinValueValidator
 from django.db import models
 
 from users.models import User
+from .storage import hashed_storage
 
 QUANTITY_ERROR = 'количество должно быть больше 0'
 
@@ -20,6 +23,11 @@ class Tag(models.Model):
         'Цвет',
         max_length=7,
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
 
     class Meta:
         ordering = ['id']
@@ -39,11 +47,29 @@ class Ingredient(models.Model):
         'Единица измерения',
         max_length=200,
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
 
     class Meta:
         ordering = ['name']
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['name'],
+                name='ingredient_name_pattern_idx',
+                opclasses=['varchar_pattern_ops'],
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -67,7 +93,12 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         'Картинка',
-        upload_to='recipe_image'
+        upload_to='recipe_image',
+        storage=hashed_storage
+    )
+    renditions_ready = models.BooleanField(
+        'Копии картинки готовы',
+        default=False,
     )
     tags = models.ManyToManyField(
         Tag,
@@ -84,11 +115,33 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+    )
+    favorites_count = models.PositiveIntegerField(
+        'В избранном',
+        default=0,
+    )
+    purchases_count = models.PositiveIntegerField(
+        'В списках покупок',
+        default=0,
+    )
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -173,3 +226,63 @@ class Purchase(models.Model):
 
     def __str__(self):
         return f'Рецепт {self.recipe} в списке покупок у {self.user}'
+
+
+class ShoppingCartTotal(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='shopping_cart_totals',
+        on_delete=models.CASCADE
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        related_name='shopping_cart_totals',
+        on_delete=models.CASCADE
+    )
+    amount = models.IntegerField(
+        verbose_name='Количество',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Итог списка покупок'
+        verbose_name_plural = 'Итоги списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_cart_total',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.ingredient} - {self.amount} у {self.user}'
+
+
+class ImageUpload(models.Model):
+    token = models.UUIDField(
+        'Токен',
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+    )
+    user = models.ForeignKey(
+        User,
+        related_name='image_uploads',
+        on_delete=models.CASCADE
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='recipe_image',
+        storage=hashed_storage
+    )
+    created = models.DateTimeField(
+        'Дата загрузки',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Загруженная картинка'
+        verbose_name_plural = 'Загруженные картинки'
+
+    def __str__(self):
+        return f'{self.image.name} от {self.user}'
@@ -0,0 +1,189 @@
+import copy
+import time
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from users.models import Follow
+from .models import Favorite, Purchase
+
+RESOURCES = ('recipes', 'tags', 'ingredients')
+VERSION_KEY = 'response_cache_version:{resource}'
+CHANGED_KEY = 'response_cache_changed:{resource}'
+STATS_KEY = 'response_cache_{outcome}:{resource}'
+RESPONSE_KEY = 'response_cache:{resource}:{version}:{digest}'
+CACHE_HEADER = 'X-Cache'
+USER_IDS_KEY = 'user_ids:{kind}:{user_id}'
+USER_IDS = {
+    'favorites': (Favorite, 'user', 'recipe_id'),
+    'cart': (Purchase, 'user', 'recipe_id'),
+    'following': (Follow, 'user', 'author_id'),
+}
+PERSONAL_PARAMS = ('is_favorited', 'is_in_shopping_cart')
+
+
+def incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_changed(resource):
+    key = CHANGED_KEY.format(resource=resource)
+    changed = cache.get(key)
+    if changed is None:
+        cache.add(key, time.time(), timeout=None)
+        changed = cache.get(key)
+    return changed
+
+
+def bump_version(*resources):
+    def bump_resources():
+        for resource in resources:
+            bump(VERSION_KEY.format(resource=resource))
+        cache.set_many({
+            CHANGED_KEY.format(resource=resource): time.time()
+            for resource in resources
+        }, timeout=None)
+
+    transaction.on_commit(bump_resources)
+
+
+def get_stats(resource):
+    return {
+        outcome: cache.get(
+            STATS_KEY.format(outcome=outcome, resource=resource), 0
+        )
+        for outcome in ('hits', 'misses')
+    }
+
+
+def reset_stats(resource):
+    cache.delete_many([
+        STATS_KEY.format(outcome=outcome, resource=resource)
+        for outcome in ('hits', 'misses')
+    ])
+
+
+def get_response_key(resource, request):
+    version = get_version(VERSION_KEY.format(resource=resource))
+    query = '&'.join(sorted(request.GET.urlencode().split('&')))
+    digest = md5(
+        f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+        .encode()
+    ).hexdigest()
+    return RESPONSE_KEY.format(
+        resource=resource, version=version, digest=digest
+    )
+
+
+def get_user_ids(user, *kinds):
+    keys = {
+        kind: USER_IDS_KEY.format(kind=kind, user_id=user.pk)
+        for kind in kinds
+    }
+    cached = cache.get_many(keys.values())
+    found, missing = {}, {}
+    for kind, key in keys.items():
+        if key in cached:
+            found[kind] = cached[key]
+            continue
+        model, user_field, id_field = USER_IDS[kind]
+        found[kind] = missing[key] = set(model.objects.filter(
+            **{user_field: user}
+        ).values_list(id_field, flat=True))
+    if missing:
+        cache.set_many(missing, settings.RESPONSE_CACHE_TIMEOUT)
+    return found
+
+
+def forget_user_ids(kind, user_id):
+    transaction.on_commit(lambda: cache.delete(
+        USER_IDS_KEY.format(kind=kind, user_id=user_id)
+    ))
+
+
+def get_recipe_items(data):
+    return data['results'] if 'results' in data else [data]
+
+
+def strip_user_flags(data):
+    for item in get_recipe_items(data):
+        item['is_favorited'] = False
+        item['is_in_shopping_cart'] = False
+        item['author']['is_subscribed'] = False
+    return data
+
+
+def apply_user_flags(data, user):
+    ids = get_user_ids(user, *USER_IDS)
+    for item in get_recipe_items(data):
+        item['is_favorited'] = item['id'] in ids['favorites']
+        item['is_in_shopping_cart'] = item['id'] in ids['cart']
+        item['author']['is_subscribed'] = (
+            item['author']['id'] in ids['following']
+        )
+    return data
+
+
+def cached_response(resource, personalized=False):
+
+    def decorator(handler):
+
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            user = request.user
+            overlay = personalized and not user.is_anonymous
+            if (
+                not settings.RESPONSE_CACHE_ENABLED
+                or request.method not in ('GET', 'HEAD')
+                or overlay and any(
+                    param in request.query_params
+                    for param in PERSONAL_PARAMS
+                )
+            ):
+                return handler(self, request, *args, **kwargs)
+            key = get_response_key(resource, request)
+            data = cache.get(key)
+            if data is not None:
+                incr(STATS_KEY.format(outcome='hits', resource=resource))
+                response = Response(
+                    apply_user_flags(data, user) if overlay else data
+                )
+                response[CACHE_HEADER] = 'HIT'
+                return response
+            incr(STATS_KEY.format(outcome='misses', resource=resource))
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                data = response.data
+                if overlay:
+                    data = strip_user_flags(copy.deepcopy(data))
+                cache.set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+            response[CACHE_HEADER] = 'MISS'
+            return response
+
+        return wrapper
+
+    return decorator
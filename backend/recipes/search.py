@@ -0,0 +1,93 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import Ingredient
+from .response_cache import bump, get_version
+
+INDEX_VERSION_KEY = 'ingredient_index_version'
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е').strip()
+
+
+def bump_index_version():
+    transaction.on_commit(lambda: bump(INDEX_VERSION_KEY))
+
+
+def get_signature():
+    stats = Ingredient.objects.aggregate(
+        count=Count('id'), updated=Max('updated_at')
+    )
+    return stats['count'], stats['updated']
+
+
+class IngredientIndex:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.signature = None
+        self.checked = None
+        self.data = ([], [])
+
+    def build(self, version, signature):
+        rows = sorted(
+            (normalize(name), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        self.data = (
+            [row[0] for row in rows],
+            [
+                {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+                for _, pk, name, measurement_unit in rows
+            ]
+        )
+        self.version = version
+        self.signature = signature
+
+    def is_current(self, version):
+        return self.version == version and (
+            time.monotonic() - self.checked
+            < settings.INGREDIENT_INDEX_CHECK_INTERVAL
+        )
+
+    def refresh(self):
+        version = get_version(INDEX_VERSION_KEY)
+        if self.is_current(version):
+            return
+        with self.lock:
+            if self.is_current(version):
+                return
+            signature = get_signature()
+            if self.version != version or self.signature != signature:
+                self.build(version, signature)
+            self.checked = time.monotonic()
+
+    def search(self, query, limit=None):
+        self.refresh()
+        if limit is None:
+            limit = settings.INGREDIENT_SEARCH_LIMIT
+        keys, items = self.data
+        query = normalize(query)
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        found = items[start:end]
+        if query and (limit is None or len(found) < limit):
+            found += [
+                items[position] for position, key in enumerate(keys)
+                if query in key and not start <= position < end
+            ]
+        return found if limit is None else found[:limit]
+
+
+ingredient_index = IngredientIndex()
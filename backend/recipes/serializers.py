@@ -1,10 +1,12 @@
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
 from users.serializers import CustomUserSerializer
-from .fields import Base64ImageField
-from .models import (Favorite, Ingredient, IngredientInRecipe, Purchase,
-                     Recipe, Tag)
+from .fields import Base64ImageField, BulkPrimaryKeyRelatedField
+from .images import rendition_urls, schedule_renditions, validate_image
+from .models import (Favorite, ImageUpload, Ingredient, IngredientInRecipe,
+                     Purchase, Recipe, Tag)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -21,6 +23,14 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit',)
 
 
+class ImageUploadSerializer(serializers.ModelSerializer):
+    image = serializers.ImageField(validators=[validate_image])
+
+    class Meta:
+        model = ImageUpload
+        fields = ('token', 'image',)
+
+
 class IngredientRecipeSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='ingredient.id')
     name = serializers.ReadOnlyField(source='ingredient.name')
@@ -37,26 +47,36 @@ class ShowRecipeSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = CustomUserSerializer(read_only=True)
     ingredients = serializers.SerializerMethodField()
-    get_ingredients = IngredientRecipeSerializer(
-        many=True,
-        required=True
-    )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image', 'text', 'cooking_time')
+                  'name', 'image', 'images', 'text', 'cooking_time')
+
+    def get_images(self, obj):
+        return rendition_urls(obj, self.context.get('request'))
+
+    def get_ingredients(self, obj):
+        return IngredientRecipeSerializer(
+            obj.ingredient_amounts.all(),
+            many=True
+        ).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context.get('request').user
         return user.is_authenticated and Favorite.objects.filter(
             recipe=obj, user=user
         ).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context.get('request').user
         return user.is_authenticated and Purchase.objects.filter(
             recipe=obj, user=user
@@ -75,7 +95,7 @@ class AddIngredientToRecipeSerializer(serializers.ModelSerializer):
 class RecipeCreateSerializer(serializers.ModelSerializer):
     author = CustomUserSerializer(read_only=True)
     ingredients = AddIngredientToRecipeSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True
     )
@@ -114,13 +134,13 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Ингредиенты повторяются!'
             )
+        if len(Ingredient.objects.in_bulk(id_ingredients)) < len(
+            id_ingredients
+        ):
+            raise serializers.ValidationError(
+                'Такого ингредиента нет!'
+            )
         for ingredient in ingredients_set:
-            try:
-                Ingredient.objects.get(id=ingredient['id'])
-            except Ingredient.DoesNotExist:
-                raise serializers.ValidationError(
-                    'Такого ингредиента нет!'
-                )
             amount = ingredient['amount']
             if amount <= 0:
                 raise serializers.ValidationError(
@@ -130,14 +150,35 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
 
     def ingredient_create(self, ingredient_data, recipe):
         IngredientInRecipe.objects.bulk_create([IngredientInRecipe(
-            ingredient=get_object_or_404(
-                Ingredient,
-                id=ingredient['id']
-            ),
+            ingredient_id=ingredient['id'],
             recipe=recipe,
             amount=ingredient['amount']
              ) for ingredient in ingredient_data])
 
+    def ingredient_update(self, ingredient_data, recipe):
+        existing = {
+            row.ingredient_id: row
+            for row in IngredientInRecipe.objects.filter(recipe=recipe)
+        }
+        new_amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredient_data
+        }
+        IngredientInRecipe.objects.filter(
+            recipe=recipe,
+            ingredient_id__in=existing.keys() - new_amounts.keys()
+        ).delete()
+        for ingredient_id, amount in new_amounts.items():
+            row = existing.get(ingredient_id)
+            if row is None:
+                IngredientInRecipe.objects.create(
+                    recipe=recipe, ingredient_id=ingredient_id, amount=amount
+                )
+            elif row.amount != amount:
+                row.amount = amount
+                row.save(update_fields=['amount'])
+
+    @transaction.atomic
     def create(self, validated_data):
         tags_data = validated_data.pop('tags')
         ingredient_data = validated_data.pop('ingredients')
@@ -146,18 +187,35 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             author=author, **validated_data)
         recipe.tags.set(tags_data)
         self.ingredient_create(ingredient_data, recipe)
+        schedule_renditions(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredient_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
-        IngredientInRecipe.objects.filter(recipe=instance).delete()
-        self.ingredient_create(ingredient_data, instance)
-        super(RecipeCreateSerializer, self).update(instance, validated_data)
+        if 'image' in validated_data:
+            validated_data['renditions_ready'] = False
+        self.ingredient_update(ingredient_data, instance)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
         instance.tags.set(tags_data)
+        if not instance.renditions_ready:
+            schedule_renditions(instance)
         return instance
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance],
+            'tags',
+            Prefetch(
+                'ingredient_amounts',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                )
+            )
+        )
         return ShowRecipeSerializer(
             instance,
             context={
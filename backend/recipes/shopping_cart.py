@@ -0,0 +1,199 @@
+import csv
+import hashlib
+import io
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.http import FileResponse, StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from .models import IngredientInRecipe, Purchase, ShoppingCartTotal
+
+FILENAME = 'shopping_cart'
+FORMATS = ('txt', 'csv', 'pdf')
+CSV_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
+PDF_TITLE = 'Список покупок'
+PDF_FONT = 'ShoppingCartFont'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def get_recipe_amounts(recipe_id):
+    return dict(IngredientInRecipe.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('ingredient_id', 'amount'))
+
+
+def get_expected_totals():
+    return IngredientInRecipe.objects.filter(
+        recipe__in_purchases__isnull=False
+    ).values(
+        'recipe__in_purchases__user', 'ingredient'
+    ).annotate(total=Sum('amount')).order_by()
+
+
+def update_cart_totals(user_ids, deltas):
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not user_ids or not deltas:
+        return
+    with transaction.atomic():
+        ShoppingCartTotal.objects.bulk_create([
+            ShoppingCartTotal(user_id=user_id, ingredient_id=ingredient_id)
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items() if delta > 0
+        ], ignore_conflicts=True)
+        totals = ShoppingCartTotal.objects.filter(
+            user_id__in=user_ids,
+            ingredient_id__in=deltas
+        )
+        totals.update(amount=F('amount') + Case(
+            *[When(ingredient_id=ingredient_id, then=Value(delta))
+              for ingredient_id, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        ))
+        totals.filter(amount__lte=0).delete()
+
+
+def add_to_cart_totals(user_id, recipe_id):
+    update_cart_totals([user_id], get_recipe_amounts(recipe_id))
+
+
+def remove_from_cart_totals(user_id, recipe_id):
+    update_cart_totals([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in get_recipe_amounts(recipe_id).items()
+    })
+
+
+def change_recipe_in_carts(recipe_id, deltas):
+    if not any(deltas.values()):
+        return
+    update_cart_totals(list(Purchase.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True)), deltas)
+
+
+def move_ingredient_in_carts(old, new):
+    changes = {}
+    for row, sign in ((old, -1), (new, 1)):
+        if row is not None:
+            recipe_id, ingredient_id, amount = row
+            deltas = changes.setdefault(recipe_id, {})
+            deltas[ingredient_id] = (
+                deltas.get(ingredient_id, 0) + sign * amount
+            )
+    for recipe_id, deltas in changes.items():
+        change_recipe_in_carts(recipe_id, deltas)
+
+
+def get_cart_ingredients(user):
+    return ShoppingCartTotal.objects.filter(
+        user=user
+    ).annotate(
+        total=F('amount')
+    ).values(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        'total'
+    ).order_by(
+        'ingredient__name',
+        'ingredient__measurement_unit'
+    )
+
+
+def get_cart_format(request):
+    return request.query_params.get('format', FORMATS[0])
+
+
+def get_cart_etag(request, *args, **kwargs):
+    file_format = get_cart_format(request)
+    if file_format not in FORMATS:
+        return None
+    rows = ShoppingCartTotal.objects.filter(
+        user=request.user
+    ).order_by('ingredient_id').values_list(
+        'ingredient_id', 'ingredient__name', 'ingredient__measurement_unit',
+        'amount'
+    )
+    digest = hashlib.md5(file_format.encode())
+    for row in rows.iterator():
+        digest.update(repr(row).encode())
+    return digest.hexdigest()
+
+
+def cart_lines(ingredients):
+    for ingredient in ingredients.iterator():
+        yield (
+            f'{ingredient["ingredient__name"]} - {ingredient["total"]} '
+            f'{ingredient["ingredient__measurement_unit"]}\n'
+        )
+
+
+def cart_csv_rows(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for ingredient in ingredients.iterator():
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['total'],
+            ingredient['ingredient__measurement_unit'],
+        ))
+
+
+def cart_pdf(ingredients):
+    if PDF_FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(
+            TTFont(PDF_FONT, settings.SHOPPING_CART_PDF_FONT)
+        )
+    buffer = io.BytesIO()
+    page = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    margin, line_height = 50, 20
+    page.setFont(PDF_FONT, 16)
+    page.drawString(margin, height - margin, PDF_TITLE)
+    page.setFont(PDF_FONT, 12)
+    y = height - margin - 2 * line_height
+    for line in cart_lines(ingredients):
+        if y < margin:
+            page.showPage()
+            page.setFont(PDF_FONT, 12)
+            y = height - margin
+        page.drawString(margin, y, line.rstrip('\n'))
+        y -= line_height
+    page.save()
+    buffer.seek(0)
+    return buffer
+
+
+def shopping_cart_response(ingredients, file_format):
+    filename = f'{FILENAME}.{file_format}'
+    if file_format == 'pdf':
+        return FileResponse(
+            cart_pdf(ingredients),
+            as_attachment=True,
+            filename=filename,
+            content_type='application/pdf'
+        )
+    if file_format == 'csv':
+        response = StreamingHttpResponse(
+            cart_csv_rows(ingredients),
+            content_type='text/csv; charset=utf-8'
+        )
+    else:
+        response = StreamingHttpResponse(
+            cart_lines(ingredients),
+            content_type='text/plain; charset=utf-8'
+        )
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
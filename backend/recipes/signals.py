@@ -0,0 +1,116 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from users.models import User
+from users.utils import connect_counter
+from .filters import forget_tag_ids
+from .models import (Favorite, Ingredient, IngredientInRecipe, Purchase,
+                     Recipe, Tag)
+from .response_cache import bump_version, forget_user_ids
+from .search import bump_index_version
+from .shopping_cart import (add_to_cart_totals, move_ingredient_in_carts,
+                            remove_from_cart_totals)
+
+AUTHOR_FIELDS = frozenset(('email', 'username', 'first_name', 'last_name'))
+PURCHASE_ROW = ('user_id', 'recipe_id')
+INGREDIENT_ROW = ('recipe_id', 'ingredient_id', 'amount')
+
+
+def get_saved_row(instance, fields):
+    if instance.pk is None:
+        return None
+    return type(instance).objects.filter(
+        pk=instance.pk
+    ).values_list(*fields).first()
+
+
+def get_row(instance, fields):
+    return tuple(getattr(instance, field) for field in fields)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(**kwargs):
+    bump_index_version()
+    bump_version('ingredients', 'recipes')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(**kwargs):
+    forget_tag_ids()
+    bump_version('tags', 'recipes')
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientInRecipe)
+@receiver(post_delete, sender=IngredientInRecipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(post_delete, sender=User)
+def recipe_changed(**kwargs):
+    bump_version('recipes')
+
+
+@receiver(post_save, sender=User)
+def author_changed(created, update_fields, **kwargs):
+    if created or update_fields is not None and not (
+        AUTHOR_FIELDS & set(update_fields)
+    ):
+        return
+    bump_version('recipes')
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(instance, **kwargs):
+    forget_user_ids('favorites', instance.user_id)
+
+
+@receiver(post_save, sender=Purchase)
+@receiver(post_delete, sender=Purchase)
+def purchase_changed(instance, **kwargs):
+    forget_user_ids('cart', instance.user_id)
+
+
+@receiver(pre_save, sender=Purchase)
+def purchase_saving(instance, **kwargs):
+    instance._saved_row = get_saved_row(instance, PURCHASE_ROW)
+
+
+@receiver(post_save, sender=Purchase)
+def purchase_saved(instance, **kwargs):
+    row = get_row(instance, PURCHASE_ROW)
+    if instance._saved_row == row:
+        return
+    if instance._saved_row is not None:
+        remove_from_cart_totals(*instance._saved_row)
+    add_to_cart_totals(*row)
+
+
+@receiver(post_delete, sender=Purchase)
+def purchase_deleted(instance, **kwargs):
+    remove_from_cart_totals(*get_row(instance, PURCHASE_ROW))
+
+
+@receiver(pre_save, sender=IngredientInRecipe)
+def ingredient_amount_saving(instance, **kwargs):
+    instance._saved_row = get_saved_row(instance, INGREDIENT_ROW)
+
+
+@receiver(post_save, sender=IngredientInRecipe)
+def ingredient_amount_saved(instance, **kwargs):
+    move_ingredient_in_carts(
+        instance._saved_row, get_row(instance, INGREDIENT_ROW)
+    )
+
+
+@receiver(post_delete, sender=IngredientInRecipe)
+def ingredient_amount_deleted(instance, **kwargs):
+    move_ingredient_in_carts(get_row(instance, INGREDIENT_ROW), None)
+
+
+connect_counter(Favorite, Recipe, 'recipe', 'favorites_count')
+connect_counter(Purchase, Recipe, 'recipe', 'purchases_count')
+connect_counter(Recipe, User, 'author', 'recipes_count')
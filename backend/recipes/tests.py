@@ -0,0 +1,454 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import User
+from .management.commands.explain_plans import check_plans, get_scans
+from .mixins import QueryBudgetExceeded
+from .models import (Favorite, Ingredient, IngredientInRecipe, Purchase,
+                     Recipe, ShoppingCartTotal, Tag)
+from .response_cache import CHANGED_KEY, RESOURCES, VERSION_KEY, get_version
+from .search import ingredient_index
+from .storage import HashedFileSystemStorage
+
+RECIPES = 12
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class RecipeTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.org',
+            password='secret-password', first_name='Имя', last_name='Фамилия'
+        )
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.org',
+            password='secret-password', first_name='Имя', last_name='Фамилия'
+        )
+        cls.tags = [
+            Tag.objects.create(name=f'тег {number}', slug=f'tag-{number}',
+                               color=f'#00000{number}')
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(4)
+        ]
+        cls.recipes = []
+        for number in range(RECIPES):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipe_image/test.png'
+            )
+            recipe.tags.set(cls.tags[:number % 3 + 1])
+            IngredientInRecipe.objects.bulk_create([
+                IngredientInRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1
+                )
+                for ingredient in ingredients
+            ])
+            cls.recipes.append(recipe)
+        Favorite.objects.create(user=cls.user, recipe=cls.recipes[0])
+        Purchase.objects.create(user=cls.user, recipe=cls.recipes[1])
+
+    def setUp(self):
+        cache.clear()
+        ingredient_index.version = None
+        self.client = APIClient()
+
+    def login(self):
+        self.client.force_authenticate(self.user)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response, context.captured_queries
+
+
+class RecipeListTests(RecipeTestCase):
+
+    def assert_constant_queries(self):
+        counts = {}
+        for limit in (1, 5, RECIPES):
+            cache.clear()
+            counts[limit] = len(self.get(f'/api/recipes/?limit={limit}')[1])
+        self.assertEqual(len(set(counts.values())), 1, counts)
+
+    def test_queries_do_not_depend_on_page_size(self):
+        self.assert_constant_queries()
+        self.login()
+        self.assert_constant_queries()
+
+    def test_count_is_not_annotated(self):
+        self.login()
+        _, queries = self.get('/api/recipes/')
+        count = next(
+            query['sql'] for query in queries if 'COUNT(' in query['sql']
+        )
+        self.assertNotIn('EXISTS', count)
+        self.assertNotIn('GROUP BY', count)
+
+    def test_user_flags(self):
+        self.login()
+        response, _ = self.get(f'/api/recipes/?limit={RECIPES}')
+        flags = {
+            item['id']: (item['is_favorited'], item['is_in_shopping_cart'])
+            for item in response.data['results']
+        }
+        self.assertEqual(flags[self.recipes[0].id], (True, False))
+        self.assertEqual(flags[self.recipes[1].id], (False, True))
+        self.assertEqual(flags[self.recipes[2].id], (False, False))
+
+
+@override_settings(QUERY_BUDGET_ENFORCED=True)
+class QueryBudgetTests(RecipeTestCase):
+
+    def assert_within_budget(self):
+        for url in (
+            '/api/recipes/',
+            f'/api/recipes/?limit={RECIPES}',
+            f'/api/recipes/?tags={self.tags[0].slug}&is_favorited=1',
+            f'/api/recipes/{self.recipes[0].id}/',
+        ):
+            cache.clear()
+            self.get(url)
+
+    def test_anonymous_within_budget(self):
+        self.assert_within_budget()
+
+    def test_authenticated_within_budget(self):
+        self.login()
+        self.assert_within_budget()
+
+    def test_exceeded_budget_fails(self):
+        self.login()
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipes[0].id}/'):
+            with mock.patch(
+                'recipes.views.RecipeViewSet.query_budget',
+                {'list': 1, 'retrieve': 1}
+            ), self.assertRaises(QueryBudgetExceeded):
+                self.client.get(url)
+
+
+class IngredientIndexTests(RecipeTestCase):
+
+    def search(self, name):
+        response, _ = self.get(f'/api/ingredients/?name={name}')
+        return [item['name'] for item in response.data]
+
+    def test_warm_index_skips_database(self):
+        self.search('ингр')
+        _, queries = self.get('/api/ingredients/?name=ингр')
+        self.assertEqual(queries, [])
+
+    def test_index_follows_changes_without_signals(self):
+        self.assertEqual(self.search('соль'), [])
+        Ingredient.objects.bulk_create([
+            Ingredient(name='соль морская', measurement_unit='г')
+        ])
+        with override_settings(INGREDIENT_INDEX_CHECK_INTERVAL=0):
+            self.assertEqual(self.search('соль'), ['соль морская'])
+
+
+class RecipeUpdateTests(RecipeTestCase):
+
+    def test_update_keeps_concurrent_counters(self):
+        recipe = self.recipes[0]
+        self.client.force_authenticate(self.author)
+
+        def get_object(view):
+            instance = Recipe.objects.get(pk=recipe.pk)
+            Recipe.objects.filter(pk=recipe.pk).update(favorites_count=5)
+            return instance
+
+        with mock.patch('recipes.views.RecipeViewSet.get_object', get_object):
+            response = self.client.patch(
+                f'/api/recipes/{recipe.pk}/',
+                {
+                    'name': 'Новое имя',
+                    'cooking_time': 15,
+                    'tags': [self.tags[0].pk],
+                    'ingredients': [{
+                        'id': recipe.ingredients.first().pk, 'amount': 3
+                    }],
+                },
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'Новое имя')
+        self.assertEqual(recipe.favorites_count, 5)
+
+
+class HashedStorageTests(TestCase):
+
+    def test_reused_file_is_touched(self):
+        with tempfile.TemporaryDirectory() as location:
+            storage = HashedFileSystemStorage(location=location)
+            name = storage.save('recipe_image/a.png', ContentFile(b'image'))
+            os.utime(storage.path(name), (0, 0))
+            self.assertEqual(
+                storage.save('recipe_image/b.png', ContentFile(b'image')),
+                name
+            )
+            self.assertGreater(os.path.getmtime(storage.path(name)), 0)
+
+
+class ResponseCacheVersionTests(RecipeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch(
+            'django.db.transaction.on_commit', lambda func: func()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def recipes_version(self):
+        return get_version(VERSION_KEY.format(resource='recipes'))
+
+    def test_login_keeps_recipe_version(self):
+        version = self.recipes_version()
+        response = self.client.post('/api/auth/token/login/', {
+            'email': self.user.email, 'password': 'secret-password'
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.recipes_version(), version)
+
+    def test_author_rename_bumps_recipe_version(self):
+        version = self.recipes_version()
+        self.author.first_name = 'Другое'
+        self.author.save()
+        self.assertNotEqual(self.recipes_version(), version)
+
+    def test_evicted_version_does_not_repeat(self):
+        key = VERSION_KEY.format(resource='recipes')
+        version = self.recipes_version()
+        cache.delete(key)
+        self.assertNotEqual(self.recipes_version(), version)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test_cached_urls_follow_request_host(self):
+        url = f'/api/recipes/{self.recipes[0].id}/'
+        self.client.get(url, HTTP_HOST='first.example.org')
+        response = self.client.get(
+            url, HTTP_HOST='second.example.org', secure=True
+        )
+        self.assertTrue(
+            response.data['image'].startswith('https://second.example.org/')
+        )
+
+
+class ConditionalRequestTests(RecipeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch(
+            'django.db.transaction.on_commit', lambda func: func()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        past = timezone.now() - timedelta(minutes=1)
+        Recipe.objects.update(pub_date=past, updated_at=past)
+        Tag.objects.update(updated_at=past)
+        Ingredient.objects.update(updated_at=past)
+        cache.set_many({
+            CHANGED_KEY.format(resource=resource): past.timestamp()
+            for resource in RESOURCES
+        }, timeout=None)
+
+    def assert_modified_after(self, url, change):
+        response = self.client.get(url)
+        last_modified = response['Last-Modified']
+        change()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_tag_delete_moves_last_modified(self):
+        self.assert_modified_after('/api/tags/', self.tags[2].delete)
+
+    def test_ingredient_delete_moves_last_modified(self):
+        self.assert_modified_after(
+            '/api/ingredients/', Ingredient.objects.last().delete
+        )
+
+    def test_author_rename_moves_last_modified(self):
+        def rename():
+            self.author.first_name = 'Другое'
+            self.author.save()
+
+        response = self.assert_modified_after(
+            f'/api/recipes/{self.recipes[2].id}/', rename
+        )
+        self.assertEqual(response.data['author']['first_name'], 'Другое')
+
+    def test_personalized_detail_has_no_last_modified(self):
+        url = f'/api/recipes/{self.recipes[2].id}/'
+        response, _ = self.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.login()
+        response, _ = self.get(url)
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+        Favorite.objects.create(user=self.user, recipe=self.recipes[2])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_favorited'])
+
+
+class ShoppingCartTests(RecipeTestCase):
+    URL = '/api/recipes/download_shopping_cart/'
+
+    def download(self, **headers):
+        response = self.client.get(self.URL, **headers)
+        return response, b''.join(getattr(response, 'streaming_content', []))
+
+    def test_ingredient_rename_changes_etag(self):
+        self.login()
+        self.client.post(f'/api/recipes/{self.recipes[2].id}/shopping_cart/')
+        response, _ = self.download()
+        ingredient = self.recipes[2].ingredients.first()
+        ingredient.name = 'переименованный'
+        ingredient.save()
+        response, content = self.download(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('переименованный', content.decode())
+
+    def assert_totals_match(self):
+        call_command('cart_totals', verify=True, stdout=io.StringIO())
+
+    def test_orm_recipe_delete_leaves_other_carts(self):
+        Purchase.objects.create(user=self.user, recipe=self.recipes[2])
+        self.recipes[1].delete()
+        self.assert_totals_match()
+        self.login()
+        _, content = self.download()
+        self.assertEqual(
+            content.decode().splitlines(),
+            [f'ингредиент {number} - 3 г' for number in range(4)]
+        )
+
+    def test_author_delete_empties_carts(self):
+        self.author.delete()
+        self.assert_totals_match()
+        self.assertFalse(ShoppingCartTotal.objects.exists())
+
+    def test_ingredient_amount_edit_updates_cart(self):
+        row = IngredientInRecipe.objects.filter(
+            recipe=self.recipes[1]
+        ).first()
+        row.amount = 10
+        row.save()
+        other = IngredientInRecipe.objects.filter(
+            recipe=self.recipes[1]
+        ).last()
+        other.delete()
+        self.assert_totals_match()
+
+    def test_api_recipe_update_updates_cart(self):
+        recipe = self.recipes[1]
+        self.client.force_authenticate(self.author)
+        ingredients = list(recipe.ingredients.all())
+        response = self.client.patch(f'/api/recipes/{recipe.pk}/', {
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'tags': [self.tags[0].pk],
+            'ingredients': [
+                {'id': ingredients[0].pk, 'amount': 7},
+                {'id': ingredients[1].pk, 'amount': 2},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assert_totals_match()
+
+
+class TagFilterTests(RecipeTestCase):
+
+    def filter_ids(self, slugs):
+        query = '&'.join(f'tags={slug}' for slug in slugs)
+        response, queries = self.get(
+            f'/api/recipes/?limit={RECIPES}&{query}'
+        )
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(len(ids), response.data['count'])
+        return ids, len(queries)
+
+    def test_no_duplicates_and_fixed_queries(self):
+        self.filter_ids([self.tags[0].slug])
+        counts = set()
+        for size in range(1, len(self.tags) + 1):
+            slugs = [tag.slug for tag in self.tags[:size]]
+            ids, count = self.filter_ids(slugs)
+            counts.add(count)
+            self.assertEqual(len(ids), len(set(ids)))
+            self.assertEqual(set(ids), set(Recipe.objects.filter(
+                tags__slug__in=slugs
+            ).values_list('id', flat=True)))
+        self.assertEqual(len(counts), 1, counts)
+
+    def test_tag_created_without_signals(self):
+        self.filter_ids([self.tags[0].slug])
+        Tag.objects.bulk_create([
+            Tag(name='новый', slug='new-tag', color='#123456')
+        ])
+        tag = Tag.objects.get(slug='new-tag')
+        self.recipes[0].tags.add(tag)
+        ids, _ = self.filter_ids(['new-tag'])
+        self.assertEqual(ids, [self.recipes[0].id])
+
+
+class QueryPlanTests(TestCase):
+    media_root = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_data', users=60, recipes=600, ingredients=200,
+            ingredients_per_recipe=5, favorites_per_user=10,
+            purchases_per_user=5, follows_per_user=5, stdout=io.StringIO()
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def test_key_queries_use_indexes(self):
+        for name, plan, scans in check_plans():
+            if scans is not None:
+                with self.subTest(name):
+                    self.assertEqual(scans, [], plan)
+
+    def test_unindexed_filter_is_reported(self):
+        _, scans = get_scans(Recipe.objects.filter(text='суп'), False)
+        self.assertEqual(scans, ['recipes_recipe'])
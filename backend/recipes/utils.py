@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
@@ -13,7 +14,8 @@ def obj_create(user, model, pk, message):
             message,
             status=status.HTTP_400_BAD_REQUEST
         )
-    model.objects.create(user=user, recipe=recipe)
+    with transaction.atomic():
+        model.objects.create(user=user, recipe=recipe)
     serializer = RecipeSubcribeSerializer(recipe)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -27,3 +29,14 @@ def obj_delete(user, model, pk, message):
         )
     obj.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
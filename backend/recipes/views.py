@@ -1,22 +1,36 @@
-from django.db.models import Sum
-from django.http.response import HttpResponse
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db.models import Exists, OuterRef, Prefetch
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import permissions, viewsets
+from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
 
+from .conditional import (ingredients_etag, ingredients_last_modified,
+                          recipe_etag, recipe_last_modified, tags_etag,
+                          tags_last_modified)
 from .filters import IngredientNameFilter, RecipeFilter
+from .mixins import QueryBudgetMixin
 from .models import (Favorite, Ingredient, IngredientInRecipe, Purchase,
                      Recipe, Tag)
 from .permissions import AdminOrAuthorOrReadOnly
-from .serializers import (IngredientSerializer, RecipeCreateSerializer,
-                          ShowRecipeSerializer, TagSerializer)
-from users.pagination import LimitPageNumberPagination
+from .response_cache import cached_response, get_user_ids
+from .search import ingredient_index
+from .serializers import (ImageUploadSerializer, IngredientSerializer,
+                          RecipeCreateSerializer, ShowRecipeSerializer,
+                          TagSerializer)
+from .shopping_cart import (FORMATS, get_cart_etag, get_cart_format,
+                            get_cart_ingredients, shopping_cart_response)
+from users.pagination import LimitCursorPagination, LimitPageNumberPagination
 from .utils import obj_create, obj_delete
 
 UNELECTED = 'Рецепта нет в избранном!'
 ERROR_FAVORITE = 'Рецепт уже есть в избранном!'
 NOT_ON_THE_LIST = 'В списке нет рецепта, который хотите удалить!'
 ERROR_ON_THE_LIST = 'Рецепт уже есть в списке!'
+UNKNOWN_FORMAT = 'Доступные форматы: {formats}'
 
 
 class TagViewSet(viewsets.ModelViewSet):
@@ -24,6 +38,17 @@ class TagViewSet(viewsets.ModelViewSet):
     serializer_class = TagSerializer
     permission_classes = (permissions.AllowAny,)
 
+    @method_decorator(condition(
+        etag_func=tags_etag, last_modified_func=tags_last_modified
+    ))
+    @cached_response('tags')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response('tags')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
@@ -31,19 +56,104 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (permissions.AllowAny,)
     filterset_class = IngredientNameFilter
 
+    @method_decorator(condition(
+        etag_func=ingredients_etag,
+        last_modified_func=ingredients_last_modified
+    ))
+    def list(self, request, *args, **kwargs):
+        if 'measurement_unit' in request.query_params:
+            return self.filtered_list(request, *args, **kwargs)
+        return Response(
+            ingredient_index.search(request.query_params.get('name', ''))
+        )
+
+    @cached_response('ingredients')
+    def filtered_list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response('ingredients')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     permission_classes = (AdminOrAuthorOrReadOnly,)
     pagination_class = LimitPageNumberPagination
     filter_backends = (DjangoFilterBackend,)
     filter_class = RecipeFilter
     queryset = Recipe.objects.all()
+    query_budget = {
+        'list': 8,
+        'retrieve': 6,
+    }
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if LimitCursorPagination.cursor_query_param in (
+                self.request.query_params
+            ):
+                self._paginator = LimitCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    @cached_response('recipes', personalized=True)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @method_decorator(condition(
+        etag_func=recipe_etag, last_modified_func=recipe_last_modified
+    ))
+    @cached_response('recipes', personalized=True)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = self.queryset
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.select_related('author').prefetch_related(
+                'tags',
+                Prefetch(
+                    'ingredient_amounts',
+                    queryset=IngredientInRecipe.objects.select_related(
+                        'ingredient'
+                    )
+                )
+            )
+        user = self.request.user
+        if self.action != 'retrieve' or user.is_anonymous:
+            return queryset
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(Purchase.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            ))
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        user = self.request.user
+        if page is None or user.is_anonymous:
+            return page
+        ids = get_user_ids(user, 'favorites', 'cart')
+        for recipe in page:
+            recipe.is_favorited = recipe.pk in ids['favorites']
+            recipe.is_in_shopping_cart = recipe.pk in ids['cart']
+        return page
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return ShowRecipeSerializer
         return RecipeCreateSerializer
 
+    def perform_content_negotiation(self, request, force=False):
+        if self.action == 'download_shopping_cart':
+            force = True
+        return super().perform_content_negotiation(request, force)
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context.update({'request': self.request})
@@ -73,23 +183,39 @@ class RecipeViewSet(viewsets.ModelViewSet):
         if request.method == 'DELETE':
             return obj_delete(user, model, pk=pk, message=NOT_ON_THE_LIST)
 
+    @action(
+        detail=False,
+        methods=['POST'],
+        url_path='images',
+        permission_classes=[permissions.IsAuthenticated],
+        parser_classes=[MultiPartParser]
+    )
+    def upload_image(self, request):
+        request._request.upload_handlers = [
+            TemporaryFileUploadHandler(request._request)
+        ]
+        serializer = ImageUploadSerializer(
+            data=request.data,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     @action(
         detail=False,
         methods=['GET'],
         permission_classes=[permissions.IsAuthenticated]
     )
+    @method_decorator(condition(etag_func=get_cart_etag))
     def download_shopping_cart(self, request):
-        ingredients = IngredientInRecipe.objects.filter(
-            recipe__in_purchases__user=request.user).values(
-            'ingredient__name',
-            'ingredient__measurement_unit').annotate(total=Sum('amount'))
-
-        shopping_cart = '\n'.join([
-            f'{ingredient["ingredient__name"]} - {ingredient["total"]} '
-            f'{ingredient["ingredient__measurement_unit"]}'
-            for ingredient in ingredients
-        ])
-        filename = 'shopping_cart.txt'
-        response = HttpResponse(shopping_cart, content_type='text/plain')
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        return response
+        file_format = get_cart_format(request)
+        if file_format not in FORMATS:
+            return Response(
+                UNKNOWN_FORMAT.format(formats=', '.join(FORMATS)),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return shopping_cart_response(
+            get_cart_ingredients(request.user),
+            file_format
+        )
@@ -6,6 +6,7 @@ from .models import User
 class UserAdmin(admin.ModelAdmin):
     list_display = ('id', 'email', 'username', 'first_name', 'last_name')
     list_filter = ('email', 'username')
+    readonly_fields = ('recipes_count', 'followers_count', 'following_count')
 
 
 admin.site.register(User, UserAdmin)
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+
+from recipes.response_cache import bump, get_version
+from .models import User
+
+AUTH_VERSION_KEY = 'auth_version:{user_id}'
+COUNTER_FIELDS = ('recipes_count', 'followers_count', 'following_count')
+
+
+class TokenCache:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry['expires'] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        entry['expires'] = time.monotonic() + settings.AUTH_CACHE_TIMEOUT
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.AUTH_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+tokens = TokenCache()
+
+
+def get_auth_version(user_id):
+    return get_version(AUTH_VERSION_KEY.format(user_id=user_id))
+
+
+def forget_user(user_id):
+    transaction.on_commit(
+        lambda: bump(AUTH_VERSION_KEY.format(user_id=user_id))
+    )
+
+
+def get_field_names(model):
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if field.attname not in COUNTER_FIELDS
+    ]
+
+
+def get_values(instance):
+    return [
+        getattr(instance, name) for name in get_field_names(type(instance))
+    ]
+
+
+def from_values(model, values):
+    return model.from_db('default', get_field_names(model), values)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        if not settings.AUTH_CACHE_SIZE:
+            return super().authenticate_credentials(key)
+        entry = tokens.get(key)
+        if entry is not None:
+            user_id = entry['user_id']
+            version = get_auth_version(user_id)
+            if entry['version'] == version:
+                user = from_values(User, entry['user'])
+                token = from_values(self.get_model(), entry['token'])
+                token.user = user
+                return user, token
+            tokens.discard(key)
+        else:
+            user_id = self.get_model().objects.filter(
+                key=key
+            ).values_list('user_id', flat=True).first()
+            if user_id is None:
+                return super().authenticate_credentials(key)
+            version = get_auth_version(user_id)
+        user, token = super().authenticate_credentials(key)
+        tokens.set(key, {
+            'user_id': user.pk,
+            'version': version,
+            'user': get_values(user),
+            'token': get_values(token),
+        })
+        return user, token
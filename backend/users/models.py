@@ -21,6 +21,18 @@ class User(AbstractUser):
         'Фамилия',
         max_length=150,
     )
+    recipes_count = models.PositiveIntegerField(
+        'Рецептов',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        'Подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        'Подписок',
+        default=0,
+    )
 
     class Meta:
         ordering = ['id']
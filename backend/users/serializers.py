@@ -1,10 +1,11 @@
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from recipes.fields import Base64ImageField
+from recipes.images import rendition_urls
 from recipes.models import Recipe
 from rest_framework import serializers
 
 from .models import Follow, User
-from .utils import get_is_subscribed
+from .utils import get_is_subscribed, get_recipes_limit
 
 
 class UserCreateSerializer(UserCreateSerializer):
@@ -31,10 +32,14 @@ class UserCreateSerializer(UserCreateSerializer):
 
 class RecipeSubcribeSerializer(serializers.ModelSerializer):
     image = Base64ImageField()
+    images = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time',)
+        fields = ('id', 'name', 'image', 'images', 'cooking_time',)
+
+    def get_images(self, obj):
+        return rendition_urls(obj, self.context.get('request'))
 
 
 class CustomUserSerializer(UserSerializer):
@@ -79,15 +84,17 @@ class FollowSerializer(serializers.ModelSerializer):
         )
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        queryset = Recipe.objects.filter(author=obj.author)
-        if limit:
-            queryset = queryset[:int(limit)]
+        if hasattr(obj.author, 'limited_recipes'):
+            queryset = obj.author.limited_recipes
+        else:
+            limit = get_recipes_limit(self.context.get('request'))
+            queryset = Recipe.objects.filter(author=obj.author)[:limit]
         return RecipeSubcribeSerializer(queryset, many=True).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
+        return obj.author.recipes_count
 
     def get_is_subscribed(self, obj):
-        return get_is_subscribed(self, obj)
+        if obj.user_id == self.context.get('request').user.id:
+            return True
+        return get_is_subscribed(self, obj.author)
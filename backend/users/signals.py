@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.response_cache import forget_user_ids
+from .authentication import forget_user, tokens
+from .models import Follow, User
+from .utils import connect_counter
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(instance, **kwargs):
+    forget_user_ids('following', instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    tokens.discard(instance.key)
+    forget_user(instance.user_id)
+
+
+connect_counter(Follow, User, 'author', 'followers_count')
+connect_counter(Follow, User, 'user', 'following_count')
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from .authentication import tokens
+from .models import User
+
+ME_URL = '/api/users/me/'
+SET_PASSWORD_URL = '/api/users/set_password/'
+
+
+@mock.patch('django.db.transaction.on_commit', lambda func: func())
+class CachedTokenAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.org',
+            password='secret-password', first_name='Имя', last_name='Фамилия'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        tokens.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def get_me(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(ME_URL)
+        return response, queries
+
+    def test_warm_token_skips_database(self):
+        self.assertEqual(self.get_me()[0].status_code, 200)
+        response, queries = self.get_me()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'authtoken_token' in query['sql']
+        ])
+
+    def test_set_password_keeps_counters(self):
+        self.assertEqual(self.get_me()[0].status_code, 200)
+        Recipe.objects.create(
+            author=self.user, name='Рецепт', text='Текст', cooking_time=10,
+            image='recipe_image/test.png'
+        )
+        response = self.client.post(SET_PASSWORD_URL, {
+            'current_password': 'secret-password',
+            'new_password': 'other-secret-password',
+        })
+        self.assertEqual(response.status_code, 204)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recipes_count, 1)
+        self.assertTrue(self.user.check_password('other-secret-password'))
+
+    def test_change_during_lookup_is_not_cached(self):
+        authenticate = TokenAuthentication.authenticate_credentials
+
+        def deactivate_after(auth, key):
+            result = authenticate(auth, key)
+            user = User.objects.get(pk=self.user.pk)
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+            return result
+
+        with mock.patch.object(
+            TokenAuthentication, 'authenticate_credentials', deactivate_after
+        ):
+            self.assertEqual(self.get_me()[0].status_code, 200)
+        self.assertEqual(self.get_me()[0].status_code, 401)
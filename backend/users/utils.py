@@ -1,8 +1,72 @@
-from .models import Follow
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from recipes.models import Recipe
+from recipes.response_cache import get_user_ids
+
+RECIPES_LIMIT = 3
+
+
+def get_following_ids(request):
+    following_ids = getattr(request, '_following_ids', None)
+    if following_ids is None:
+        following_ids = get_user_ids(request.user, 'following')['following']
+        request._following_ids = following_ids
+    return following_ids
 
 
 def get_is_subscribed(self, obj):
-    user = self.context.get('request').user
-    return user.is_authenticated and Follow.objects.filter(
-        author=obj, user=user
-    ).exists()
+    request = self.context.get('request')
+    return request.user.is_authenticated and (
+        obj.id in get_following_ids(request)
+    )
+
+
+def get_recipes_limit(request):
+    try:
+        limit = int(request.query_params.get('recipes_limit', RECIPES_LIMIT))
+    except (TypeError, ValueError):
+        return RECIPES_LIMIT
+    return limit if limit > 0 else RECIPES_LIMIT
+
+
+def get_limited_recipes(limit):
+    return Recipe.objects.filter(pk__in=Subquery(
+        Recipe.objects.filter(
+            author=OuterRef('author')
+        ).values('pk')[:limit]
+    ))
+
+
+def change_counter(model, pk, field, delta):
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def connect_counter(sender, model, fk, field):
+    def created(instance, created, **kwargs):
+        if created:
+            change_counter(model, getattr(instance, f'{fk}_id'), field, 1)
+
+    def deleted(instance, **kwargs):
+        change_counter(model, getattr(instance, f'{fk}_id'), field, -1)
+
+    dispatch_uid = f'{model.__name__}.{field}'
+    post_save.connect(
+        created, sender=sender, weak=False, dispatch_uid=dispatch_uid
+    )
+    post_delete.connect(
+        deleted, sender=sender, weak=False, dispatch_uid=dispatch_uid
+    )
+
+
+def count_related(model, fk):
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{fk: OuterRef('pk')}
+        ).order_by().values(fk).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
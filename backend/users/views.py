@@ -1,3 +1,5 @@
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from django.shortcuts import get_object_or_404
 from djoser.serializers import SetPasswordSerializer
 from rest_framework import permissions, status, viewsets
@@ -9,6 +11,7 @@ from .pagination import LimitPageNumberPagination
 from .permissions import IsAdminOrReadOnly
 from .serializers import (CustomUserSerializer, FollowSerializer,
                           UserCreateSerializer)
+from .utils import get_limited_recipes, get_recipes_limit
 
 ERROR_UNSUBSCRIBE = 'Вы не можете отписаться повторно!'
 ERROR_TWICE_SUBSCRIBE = 'Вы не можете подписаться повторно!'
@@ -57,7 +60,7 @@ class UserViewSet(viewsets.ModelViewSet):
         self.request.user.set_password(
             serializer.validated_data.get('new_password')
         )
-        self.request.user.save()
+        self.request.user.save(update_fields=['password'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -65,6 +68,7 @@ class UserViewSet(viewsets.ModelViewSet):
         methods=['POST', 'DELETE'],
         url_path=r'(?P<id>\d+)/subscribe',
     )
+    @transaction.atomic
     def subscribe(self, request, id):
         user = request.user
         author = get_object_or_404(User, id=id)
@@ -97,8 +101,15 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def subscriptions(self, request):
         user = request.user
-        queryset = Follow.objects.filter(user=user)
+        queryset = Follow.objects.filter(user=user).select_related(
+            'author'
+        ).order_by('-id')
         pages = self.paginate_queryset(queryset)
+        prefetch_related_objects(pages, Prefetch(
+            'author__recipes',
+            queryset=get_limited_recipes(get_recipes_limit(request)),
+            to_attr='limited_recipes'
+        ))
         serializer = FollowSerializer(
             pages,
             many=True,